@@ -0,0 +1,14 @@
+"""
+mora 推送流水线的离线基准测试
+
+不访问 cf.mora.jp，也不需要真实机器人：
+    - fixtures.py  生成不同规模的 newRelease_*.jsonp 分页和 10/1k/10k 场景的 config.json
+    - server.py    本地 aiohttp 服务，按可配置延迟提供分页和封面
+    - fakes.py     假机器人和消息接收端，替代 PlatformUtils.send_message
+    - run.py       依次测量 拉取 → 过滤 → 匹配 → 渲染 → 推送 各阶段的耗时和吞吐
+
+在机器人的运行环境中执行：
+    python path/to/mora_push/_bench/run.py --albums 100,1000 --scenes 10,1000,10000
+
+目录名以下划线开头，nonebot.load_plugins 不会把它当作插件加载。
+"""
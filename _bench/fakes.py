@@ -0,0 +1,44 @@
+import asyncio
+import time
+from typing import List
+
+class FakeBot:
+    """只提供推送用到的接口的假机器人"""
+
+    def __init__(self, self_id: str, group_ids: List[str], friend_ids: List[str], api_latency: float = 0.0):
+        self.self_id = self_id
+        self.group_ids = group_ids
+        self.friend_ids = friend_ids
+        self.api_latency = api_latency
+
+    async def get_group_list(self):
+        await asyncio.sleep(self.api_latency)
+        return [{"group_id": group_id} for group_id in self.group_ids]
+
+    async def get_friend_list(self):
+        await asyncio.sleep(self.api_latency)
+        return [{"user_id": user_id} for user_id in self.friend_ids]
+
+class SendSink:
+    """
+    替代 PlatformUtils.send_message 的消息接收端，记录发送次数和耗时
+
+    :param latency: 每次发送的模拟耗时，单位秒
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sent = 0
+        self.targets = set()
+        self.first_at = None
+        self.last_at = None
+
+    async def send_message(self, bot, message, user_id=None, group_id=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        now = time.perf_counter()
+        if self.first_at is None:
+            self.first_at = now
+        self.last_at = now
+        self.sent += 1
+        self.targets.add((user_id, group_id))
+        return True
@@ -0,0 +1,108 @@
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 每个分页文件的专辑数
+PAGE_SIZE = 100
+
+# 生成艺人名用的片段，包含分隔符和长短不一的名字，覆盖 is_same_artist 的各个分支
+NAME_PARTS = [
+    "YOASOBI", "Aimer", "LiSA", "Ado", "MILGRAM", "ClariS", "fripSide", "Roselia",
+    "米津玄師", "花澤香菜", "水樹奈々", "澤野弘之", "梶浦由記", "坂本真綾", "上坂すみれ",
+    "Various Artists", "東京フィルハーモニー交響楽団", "A", "Y", "宮", "ZAQ",
+]
+SEPARATORS = [" & ", ", ", "、", " / "]
+
+def make_artist_name(rng: random.Random) -> str:
+    count = rng.choice([1, 1, 1, 2, 3])
+    names = rng.sample(NAME_PARTS, count)
+    name = names[0]
+    for part in names[1:]:
+        name += rng.choice(SEPARATORS) + part
+    return name
+
+def make_albums(target_date: date, count: int, cover_base: str, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    生成某一天发布的专辑，字段与 newRelease 接口一致
+
+    :param target_date: 发布日期
+    :param count: 专辑数
+    :param cover_base: 封面地址前缀，对应 packageUrl
+    """
+    rng = random.Random(f"{seed}-{target_date}")
+    disp_start_date = target_date.strftime("%Y/%m/%d") + " 00:00:00"
+    albums = []
+    for idx in range(count):
+        albums.append({
+            "artistName": make_artist_name(rng),
+            "title": f"アルバム {target_date:%m%d}-{idx} " + "".join(rng.choice("あいうえおかきくけこ") for _ in range(rng.randint(2, 12))),
+            "dispStartDate": disp_start_date,
+            "trackCount": rng.randint(1, 30),
+            "packageComment": rng.choice(["", "ハイレゾ", "配信限定", "TVアニメ主題歌\r\n収録"]),
+            "packageUrl": cover_base,
+            "packageimage": f"{idx % 200}.jpg",
+            "materialNo": rng.randint(10**7, 10**8),
+            "mediaFormatNo": rng.choice([10, 11, 12]),
+        })
+        # 模拟同一专辑的不同格式，检验去重
+        if rng.random() < 0.1:
+            albums.append(dict(albums[-1], mediaFormatNo=13))
+    return albums
+
+def make_pages(end_date: date, days: int, albums_per_day: int, cover_base: str, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    生成按发布日期从新到旧排列的分页数据
+
+    :param end_date: 最新的发布日期
+    :param days: 覆盖的天数
+    :param albums_per_day: 每天的专辑数
+    :return: 分页列表，第 i 项为第 i + 1 页
+    """
+    albums = []
+    for offset in range(days):
+        albums.extend(make_albums(end_date - timedelta(days=offset), albums_per_day, cover_base, seed))
+    chunks = [albums[i:i + PAGE_SIZE] for i in range(0, len(albums), PAGE_SIZE)]
+    return [{"splitFileCnt": len(chunks), "newReleaseList": chunk} for chunk in chunks]
+
+def to_jsonp(page: Dict[str, Any]) -> bytes:
+    """包装成接口返回的 moraCallback(...); 格式"""
+    return b"moraCallback(" + json.dumps(page, ensure_ascii=False).encode("utf8") + b");"
+
+def make_scenes(count: int, follows: int = 20, blacklist: int = 2, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    生成 config.json 格式的场景配置，少数黑名单组合被大量场景共用，与实际分布相近
+
+    :param count: 场景数
+    :param follows: 每个场景平均关注的艺人数
+    :param blacklist: 每个场景平均拉黑的艺人数
+    """
+    rng = random.Random(seed)
+    common_blacklists = [[], ["Various Artists"], ["東京フィルハーモニー交響楽団", "Various Artists"]]
+    scenes = []
+    for idx in range(count):
+        type = rng.choice([0, 1])
+        if rng.random() < 0.8:
+            blacklist_names = rng.choice(common_blacklists)
+        else:
+            blacklist_names = rng.sample(NAME_PARTS, rng.randint(0, blacklist * 2))
+        follow_names = rng.sample(NAME_PARTS, min(len(NAME_PARTS), rng.randint(0, follows * 2)))
+        scenes.append({
+            "id": str(10000 + idx),
+            "type": type,
+            "watch_artists": [{"name": name, "alias": "", "type": type} for name in follow_names],
+            "blacklist_artists": [{"name": name, "alias": "", "type": type} for name in blacklist_names],
+            "auto_push": True,
+        })
+    return scenes
+
+def write_fixtures(path: Path, end_date: date, cover_base: str):
+    """把各规模的分页和配置写入目录，便于离线复用或人工检查"""
+    path.mkdir(parents=True, exist_ok=True)
+    for albums_per_day in (100, 1000):
+        for page_idx, page in enumerate(make_pages(end_date, 7, albums_per_day, cover_base), 1):
+            (path / f"newRelease_{albums_per_day}_{page_idx:04d}.jsonp").write_bytes(to_jsonp(page))
+    for count in (10, 1000, 10000):
+        with open(path / f"config_{count}.json", "w", encoding="utf8") as f:
+            json.dump(make_scenes(count), f, ensure_ascii=False)
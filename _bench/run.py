@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import importlib
+import json
+from pathlib import Path
+import sys
+import tempfile
+import time
+import types
+from datetime import date
+from typing import Any, Dict, List
+
+PLUGIN_DIR = Path(__file__).resolve().parent.parent
+# 不执行插件的 __init__.py（其中会 load_plugins 注册命令和定时任务），直接以虚拟包导入各模块
+PACKAGE = "mora_push_bench"
+
+def load_modules() -> Dict[str, types.ModuleType]:
+    import nonebot
+
+    nonebot.init()
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [str(PLUGIN_DIR)]
+    sys.modules[PACKAGE] = package
+    names = ["cache", "checker", "archive", "store", "render", "utility", "dispatcher", "push",
+             "_bench.fixtures", "_bench.server", "_bench.fakes"]
+    return {name: importlib.import_module(f"{PACKAGE}.{name}") for name in names}
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+class Report:
+    """收集并打印各阶段的耗时和吞吐"""
+
+    def __init__(self):
+        self.rows: List[Dict[str, Any]] = []
+
+    def add(self, case: str, stage: str, seconds: float, count: int, unit: str, latencies: List[float] = None):
+        self.rows.append({
+            "case": case,
+            "stage": stage,
+            "seconds": seconds,
+            "count": count,
+            "unit": unit,
+            "throughput": count / seconds if seconds > 0 else float("inf"),
+            "p50_ms": percentile(latencies or [], 0.5) * 1000,
+            "p95_ms": percentile(latencies or [], 0.95) * 1000,
+        })
+        row = self.rows[-1]
+        print(f"{case:<24} {stage:<22} {seconds:>9.3f}s {count:>8} {unit:<8} "
+              f"{row['throughput']:>12.1f}/s  p50 {row['p50_ms']:>8.2f}ms  p95 {row['p95_ms']:>8.2f}ms")
+
+async def run_case(
+    modules: Dict[str, types.ModuleType],
+    report: Report,
+    work_dir: Path,
+    albums_per_day: int,
+    scene_count: int,
+    args: argparse.Namespace
+):
+    cache, checker, archive, store, render, utility, dispatcher, push = (
+        modules[name] for name in ("cache", "checker", "archive", "store", "render", "utility", "dispatcher", "push")
+    )
+    fixtures, server_module, fakes = modules["_bench.fixtures"], modules["_bench.server"], modules["_bench.fakes"]
+    case = f"{albums_per_day}albums/{scene_count}scenes"
+    case_dir = work_dir / case.replace("/", "_")
+
+    # 数据目录全部指向临时目录
+    cache.release_cache.__init__(case_dir / "releases")
+    cache.cover_cache.__init__(case_dir / "covers")
+    archive.release_archive.close()
+    archive.release_archive.__init__(case_dir / "archive.db")
+
+    target_date = date(2025, 5, 30)
+    pages = fixtures.make_pages(target_date, args.days, albums_per_day, f"http://127.0.0.1:{args.port}/cover/")
+    server = server_module.FixtureServer({"jpn": pages}, latency=args.latency, jitter=args.jitter, port=args.port)
+    await server.start()
+    checker.MoraReleaseChecker.page_url = staticmethod(
+        lambda region, page, timestamp: f"{server.base_url}/newRelease_{region}_{page:04d}.jsonp?_{timestamp}"
+    )
+
+    scenes = fixtures.make_scenes(scene_count)
+    config_file = case_dir / "config.json"
+    config_file.parent.mkdir(parents=True, exist_ok=True)
+    config_file.write_text(json.dumps(scenes, ensure_ascii=False), encoding="utf8")
+    store.scene_store.__init__(config_file)
+    store.scene_store.load()
+    utility._blacklist_filters.clear()
+    # 关注索引按上一组场景建立，切换配置后需要重建
+    utility._artist_followers = None
+
+    try:
+        # 拉取：冷启动走本地服务，热启动命中缓存
+        start = time.perf_counter()
+        albums = await checker.MoraReleaseChecker.get_albums(target_date, "jpn", force_refresh=True)
+        report.add(case, "fetch (cold)", time.perf_counter() - start, server.requests["page"], "pages")
+        start = time.perf_counter()
+        await checker.MoraReleaseChecker.get_albums(target_date, "jpn")
+        report.add(case, "fetch (cached)", time.perf_counter() - start, 1, "queries")
+
+        # 黑名单过滤：逐个场景过滤与一次扫描分组过滤
+        scene_keys = [(scene["id"], scene["type"]) for scene in scenes]
+        latencies = []
+        start = time.perf_counter()
+        for scene in scenes:
+            scene_start = time.perf_counter()
+            utility.filter_albums(albums, scene.get("blacklist_artists", []))
+            latencies.append(time.perf_counter() - scene_start)
+        report.add(case, "filter (per scene)", time.perf_counter() - start, len(scenes), "scenes", latencies)
+        start = time.perf_counter()
+        filters = {key: utility.get_blacklist_filter(*key) for key in scene_keys}
+        utility.BlacklistFilter.partition(albums, filters)
+        report.add(case, "filter (partition)", time.perf_counter() - start, len(scenes), "scenes")
+
+        # 逐对调用 is_same_artist
+        sample = scenes[:args.match_sample]
+        pairs = 0
+        start = time.perf_counter()
+        for scene in sample:
+            for artist in scene["watch_artists"]:
+                for album in albums:
+                    utility.MoraHelper.is_same_artist(artist["name"], album["artistName"])
+                    pairs += 1
+        report.add(case, "is_same_artist", time.perf_counter() - start, pairs, "pairs")
+
+        # 关注艺人匹配，包含从本地服务下载封面
+        latencies = []
+        start = time.perf_counter()
+        matcher = utility.ArtistMatcher(albums)
+        for scene in sample:
+            scene_start = time.perf_counter()
+            await utility.MoraHelper.get_watch_artists_albums(albums, scene["watch_artists"], matcher=matcher)
+            latencies.append(time.perf_counter() - scene_start)
+        report.add(case, "watch artists", time.perf_counter() - start, len(sample), "scenes", latencies)
+        report.add(case, "cover cache", 0, server.requests["cover"], "misses")
+
+        # 总表渲染
+        if not args.no_render:
+            start = time.perf_counter()
+            await utility.MoraHelper.get_all_albums_image(albums, target_date)
+            report.add(case, "render (cold)", time.perf_counter() - start, len(albums), "rows")
+            start = time.perf_counter()
+            await utility.MoraHelper.get_all_albums_image(albums, target_date)
+            report.add(case, "render (cached)", time.perf_counter() - start, len(albums), "rows")
+        else:
+            async def no_render(rows, date_str, region):
+                return []
+            render.table_renderer.render = no_render
+
+        # 推送扇出：与每日推送相同的 PushPlanner + 发送器，发送到假的接收端
+        sink = fakes.SendSink(latency=args.send_latency)
+        dispatcher.PlatformUtils.send_message = sink.send_message
+        push_dispatcher = dispatcher.PushDispatcher(rate=args.send_rate, burst=args.send_rate, concurrency=args.send_concurrency)
+        bot = fakes.FakeBot(
+            "bench",
+            [scene["id"] for scene in scenes if scene["type"] == 0],
+            [scene["id"] for scene in scenes if scene["type"] == 1],
+        )
+        start = time.perf_counter()
+        planner = push.PushPlanner(albums, target_date)
+        planner.prepare(utility.get_auto_push_scenes())
+
+        async def send_scene(scene):
+            user_id = scene["id"] if scene["type"] == 1 else None
+            group_id = scene["id"] if scene["type"] == 0 else None
+            async for message in planner.iter_messages(scene["id"], utility.SceneType(scene["type"])):
+                await push_dispatcher.send(bot=bot, user_id=user_id, group_id=group_id, message=message)
+
+        results = await asyncio.gather(*[send_scene(scene) for scene in scenes], return_exceptions=True)
+        failures = [result for result in results if isinstance(result, Exception)]
+        report.add(case, "push fan-out", time.perf_counter() - start, sink.sent, "messages")
+        if failures:
+            print(f"{case}: {len(failures)} 个场景推送失败，例如 {failures[0]!r}")
+    finally:
+        await server.stop()
+
+async def main(args: argparse.Namespace):
+    modules = load_modules()
+    client = importlib.import_module(f"{PACKAGE}.client")
+    report = Report()
+    with tempfile.TemporaryDirectory() as work_dir:
+        if args.write_fixtures:
+            modules["_bench.fixtures"].write_fixtures(Path(args.write_fixtures), date(2025, 5, 30), f"http://127.0.0.1:{args.port}/cover/")
+        try:
+            for albums_per_day in args.albums:
+                for scene_count in args.scenes:
+                    await run_case(modules, report, Path(work_dir), albums_per_day, scene_count, args)
+        finally:
+            await client.close_session()
+            modules["archive"].release_archive.close()
+    if args.output:
+        Path(args.output).write_text(json.dumps(report.rows, ensure_ascii=False, indent=2), encoding="utf8")
+
+def parse_args() -> argparse.Namespace:
+    int_list = lambda text: [int(item) for item in text.split(",") if item]
+    parser = argparse.ArgumentParser(description="mora 推送流水线离线基准测试")
+    parser.add_argument("--albums", type=int_list, default=[100, 1000], help="每天的专辑数，逗号分隔")
+    parser.add_argument("--scenes", type=int_list, default=[10, 1000, 10000], help="场景数，逗号分隔")
+    parser.add_argument("--days", type=int, default=7, help="分页覆盖的天数")
+    parser.add_argument("--latency", type=float, default=0.02, help="本地服务每个请求的延迟，单位秒")
+    parser.add_argument("--jitter", type=float, default=0.0, help="本地服务随机附加的延迟上限，单位秒")
+    parser.add_argument("--port", type=int, default=18080, help="本地服务端口")
+    parser.add_argument("--match-sample", type=int, default=100, help="参与逐对匹配和关注匹配测试的场景数")
+    parser.add_argument("--send-latency", type=float, default=0.0, help="每次发送消息的模拟耗时，单位秒")
+    parser.add_argument("--send-rate", type=float, default=1000, help="发送器每秒发送数")
+    parser.add_argument("--send-concurrency", type=int, default=64, help="发送器并发数")
+    parser.add_argument("--no-render", action="store_true", help="跳过总表图片渲染")
+    parser.add_argument("--write-fixtures", help="把分页和配置样本写入该目录")
+    parser.add_argument("--output", help="把结果以 JSON 写入该文件")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,73 @@
+import asyncio
+from collections import Counter
+import random
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+class FixtureServer:
+    """
+    本地替身服务，提供 newRelease 分页和封面图片
+
+    :param pages: 地区 -> 分页列表
+    :param latency: 每个请求的固定延迟，单位秒
+    :param jitter: 随机附加的延迟上限，单位秒
+    :param cover_size: 封面图片字节数
+    """
+
+    def __init__(
+        self,
+        pages: Dict[str, List[Dict[str, Any]]],
+        latency: float = 0.02,
+        jitter: float = 0.0,
+        cover_size: int = 200 * 1024,
+        port: int = 18080
+    ):
+        from .fixtures import to_jsonp
+
+        self.pages = {region: [to_jsonp(page) for page in region_pages] for region, region_pages in pages.items()}
+        self.latency = latency
+        self.jitter = jitter
+        self.cover = bytes(random.Random(0).getrandbits(8) for _ in range(cover_size))
+        self.port = port
+        self.requests: Counter = Counter()
+        self.bytes_sent = 0
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def _delay(self):
+        await asyncio.sleep(self.latency + random.random() * self.jitter)
+
+    async def _page(self, request: web.Request) -> web.Response:
+        await self._delay()
+        region = request.match_info["region"]
+        page = int(request.match_info["page"])
+        self.requests["page"] += 1
+        region_pages = self.pages.get(region, [])
+        if not 1 <= page <= len(region_pages):
+            return web.Response(status=404)
+        body = region_pages[page - 1]
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type="application/javascript")
+
+    async def _cover(self, request: web.Request) -> web.Response:
+        await self._delay()
+        self.requests["cover"] += 1
+        self.bytes_sent += len(self.cover)
+        return web.Response(body=self.cover, content_type="image/jpeg")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get(r"/newRelease_{region}_{page:\d+}.jsonp", self._page)
+        app.router.add_get("/cover/{name}", self._cover)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", self.port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,115 @@
+import json
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 插件用到的专辑字段，其余字段解析后丢弃
+ALBUM_FIELDS = (
+    "artistName",
+    "title",
+    "dispStartDate",
+    "trackCount",
+    "packageComment",
+    "packageUrl",
+    "packageimage",
+)
+_ALBUM_FIELD_SET = frozenset(ALBUM_FIELDS)
+
+_decoder = json.JSONDecoder()
+
+class Album(Mapping):
+    """
+    只保存插件用到字段的专辑记录
+
+    使用 __slots__ 保存字段，比保留接口返回的完整字典占用更少内存；
+    实现只读 Mapping 接口，原有的 album["title"]、album.get(...) 写法不变，
+    序列化时通过 json.dumps(..., default=dict) 转为字典。
+    """
+
+    __slots__ = ALBUM_FIELDS
+
+    def __init__(
+        self,
+        artistName: str,
+        title: str,
+        dispStartDate: str,
+        trackCount: int,
+        packageComment: str = "",
+        packageUrl: str = "",
+        packageimage: str = ""
+    ):
+        self.artistName = artistName
+        self.title = title
+        self.dispStartDate = dispStartDate
+        self.trackCount = trackCount
+        self.packageComment = packageComment
+        self.packageUrl = packageUrl
+        self.packageimage = packageimage
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Album":
+        """从接口返回或缓存中的专辑字典提取需要的字段"""
+        if isinstance(data, cls):
+            return data
+        return cls(
+            data.get("artistName") or "",
+            data.get("title") or "",
+            data.get("dispStartDate") or "",
+            data.get("trackCount") or 0,
+            data.get("packageComment") or "",
+            data.get("packageUrl") or "",
+            data.get("packageimage") or "",
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _ALBUM_FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(ALBUM_FIELDS)
+
+    def __len__(self) -> int:
+        return len(ALBUM_FIELDS)
+
+    def __repr__(self) -> str:
+        return f"Album({dict(self)!r})"
+
+    def __reduce__(self):
+        return (Album, tuple(getattr(self, field) for field in ALBUM_FIELDS))
+
+def parse_jsonp(raw: bytes) -> Dict[str, Any]:
+    """
+    解析 moraCallback({...}); 格式的响应
+
+    安装了 orjson 时直接解析去掉回调包装后的 memoryview 切片，不复制数据；
+    否则解码为字符串后用 raw_decode 从括号后开始解析，同样不做切片复制。
+    """
+    if orjson is not None:
+        start = raw.index(b"(") + 1
+        end = raw.rindex(b")")
+        return orjson.loads(memoryview(raw)[start:end])
+    text = raw.decode("utf8")
+    data, _ = _decoder.raw_decode(text, text.index("(") + 1)
+    return data
+
+def parse_page(raw: bytes) -> Dict[str, Any]:
+    """
+    解析新曲列表分页，专辑转换为 Album
+
+    :param raw: 响应的原始字节
+    :return: 包含 splitFileCnt 和 newReleaseList 的字典
+    """
+    data = parse_jsonp(raw)
+    return {
+        "splitFileCnt": data.get("splitFileCnt", 0),
+        "newReleaseList": to_albums(data.get("newReleaseList") or []),
+    }
+
+def to_albums(albums: List[Dict[str, Any]]) -> List[Album]:
+    """把专辑字典列表转换为 Album 列表"""
+    return [Album.from_dict(album) for album in albums]
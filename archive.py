@@ -0,0 +1,195 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import nonebot
+
+from zhenxun.configs.path_config import DATA_PATH
+from zhenxun.services.log import logger
+
+from .matching import ArtistMatcher
+
+archive_path: Path = DATA_PATH / "mora/archive.db"
+
+# 搜索结果最多返回的条数
+SEARCH_LIMIT = 20
+# 关注艺人时最多展示的历史专辑数
+RECENT_LIMIT = 5
+
+class ReleaseArchive:
+    """
+    新曲历史归档，保存所有拉取过的新曲列表
+
+    使用 SQLite 保存专辑，并在 title/artistName/packageComment 上建立 FTS5 trigram 全文索引，
+    关键词少于 3 个字或 SQLite 不支持 trigram 时退回 LIKE 查询。
+    归档写入在线程池中执行，连接由锁保护，可以在不同线程间共用。
+    """
+
+    def __init__(self, path: Path = archive_path):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        # 是否可以使用全文索引
+        self._fts = False
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            try:
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS albums (
+                        id INTEGER PRIMARY KEY,
+                        region TEXT NOT NULL,
+                        disp_start_date TEXT NOT NULL,
+                        artist_name TEXT NOT NULL,
+                        title TEXT NOT NULL,
+                        track_count INTEGER,
+                        package_comment TEXT,
+                        raw TEXT NOT NULL,
+                        UNIQUE (region, artist_name, disp_start_date, title, track_count)
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_albums_date ON albums (disp_start_date);
+                """)
+                self._fts = self._create_fts(conn)
+            except Exception:
+                conn.close()
+                raise
+            # 表结构创建成功后才保存连接，失败时下次重新连接
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _create_fts(conn: sqlite3.Connection) -> bool:
+        """创建 FTS5 trigram 全文索引，SQLite 版本低于 3.34 或没有 FTS5 时返回 False"""
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'albums_fts'").fetchone() is not None
+        try:
+            conn.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS albums_fts USING fts5(
+                    title, artist_name, package_comment,
+                    content='albums', content_rowid='id', tokenize='trigram'
+                );
+                CREATE TRIGGER IF NOT EXISTS albums_fts_insert AFTER INSERT ON albums BEGIN
+                    INSERT INTO albums_fts (rowid, title, artist_name, package_comment)
+                    VALUES (new.id, new.title, new.artist_name, new.package_comment);
+                END;
+            """)
+            if not exists:
+                # 之前不支持全文索引时归档的专辑补建索引
+                conn.execute("INSERT INTO albums_fts (albums_fts) VALUES ('rebuild')")
+        except sqlite3.Error as e:
+            logger.warning(f"当前 SQLite 不支持 FTS5 trigram 全文索引，搜索改用 LIKE 查询: {e}")
+            return False
+        return True
+
+    async def add(self, region: str, albums: List[Dict[str, Any]]):
+        """
+        归档一批专辑，已存在的专辑会被忽略
+
+        :param region: 地区代码
+        :param albums: 专辑字典列表
+        """
+        if not albums:
+            return
+        await asyncio.to_thread(self._add, region, albums)
+
+    def _add(self, region: str, albums: List[Dict[str, Any]]):
+        try:
+            with self._lock, self.conn:
+                self.conn.execute("BEGIN")
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO albums "
+                    "(region, disp_start_date, artist_name, title, track_count, package_comment, raw) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            region,
+                            album["dispStartDate"],
+                            album["artistName"],
+                            album["title"],
+                            album["trackCount"],
+                            album.get("packageComment") or "",
+                            json.dumps(album, ensure_ascii=False, default=dict),
+                        )
+                        for album in albums
+                    ]
+                )
+        except Exception as e:
+            logger.warning(f"归档 mora 新曲失败: {e}")
+
+    def _query(self, column: Optional[str], keyword: str, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._select(column, keyword, limit)
+        return [{**json.loads(row["raw"]), "region": row["region"]} for row in rows]
+
+    def _select(self, column: Optional[str], keyword: str, limit: int) -> List[sqlite3.Row]:
+        conn = self.conn
+        if self._fts and len(keyword) >= 3:
+            # trigram 分词要求关键词至少 3 个字，列名前缀限定搜索范围
+            match = '"' + keyword.replace('"', '""') + '"'
+            if column:
+                match = f"{column} : {match}"
+            rows = conn.execute(
+                "SELECT albums.raw, albums.region FROM albums_fts "
+                "JOIN albums ON albums.id = albums_fts.rowid "
+                "WHERE albums_fts MATCH ? ORDER BY albums.disp_start_date DESC LIMIT ?",
+                (match, limit)
+            ).fetchall()
+        else:
+            pattern = "%" + keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            columns = [column] if column else ["title", "artist_name", "package_comment"]
+            condition = " OR ".join(f"{c} LIKE ? ESCAPE '\\'" for c in columns)
+            rows = conn.execute(
+                f"SELECT raw, region FROM albums WHERE {condition} ORDER BY disp_start_date DESC LIMIT ?",
+                (*[pattern] * len(columns), limit)
+            ).fetchall()
+        return rows
+
+    def search(self, keyword: str, limit: int = SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        """
+        按关键词搜索专辑名、艺人名和简介
+
+        :param keyword: 关键词
+        :param limit: 最多返回的条数
+        :return: 按发布日期从新到旧排列的专辑列表
+        """
+        keyword = keyword.strip()
+        if not keyword:
+            return []
+        return self._query(None, keyword, limit)
+
+    def artist_albums(self, name: str, limit: int = RECENT_LIMIT) -> List[Dict[str, Any]]:
+        """
+        获取艺人最近的专辑，匹配规则与 MoraHelper.is_same_artist 一致
+
+        :param name: 艺人名
+        :param limit: 最多返回的条数
+        :return: 按发布日期从新到旧排列的专辑列表
+        """
+        name = name.strip()
+        if not name:
+            return []
+        # 先按子串取出候选，再按关注匹配规则筛选
+        candidates = self._query("artist_name", name, limit * 20)
+        return ArtistMatcher(candidates).match(name)[:limit]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+release_archive = ReleaseArchive()
+
+driver = nonebot.get_driver()
+
+@driver.on_shutdown
+async def _():
+    release_archive.close()
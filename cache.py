@@ -0,0 +1,431 @@
+import asyncio
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import pytz
+
+from zhenxun.configs.path_config import DATA_PATH
+from zhenxun.services.log import logger
+
+from .album import to_albums
+from .archive import release_archive
+from .metrics import metrics
+
+release_cache_path: Path = DATA_PATH / "mora/releases"
+cover_cache_path: Path = DATA_PATH / "mora/covers"
+
+# 当天（及未来日期）数据的有效期，单位秒
+RELEASE_TTL = 300
+# 超过有效期但未超过该时长的数据会先返回旧数据，同时在后台刷新
+RELEASE_MAX_STALE = 3600
+
+# 封面内存缓存上限，单位字节
+COVER_MEMORY_LIMIT = 64 * 1024 * 1024
+# 封面磁盘缓存上限，单位字节
+COVER_DISK_LIMIT = 1024 * 1024 * 1024
+
+JP_TIMEZONE = pytz.timezone("Asia/Tokyo")
+
+class _PageStream:
+    """
+    一次进行中的新曲拉取，保存已经拉取到的分页
+
+    同时查询的请求可以从头逐页读取，读完已有的分页后等待下一页，拉取结束后停止。
+    failed_pages 记录拉取失败的页码，拉取结束后不为空说明结果不完整。
+    """
+
+    def __init__(self):
+        self.pages: List[List[Dict[str, Any]]] = []
+        self.failed_pages: List[int] = []
+        self.done = False
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def append(self, page_albums: List[Dict[str, Any]]):
+        self.pages.append(page_albums)
+        self._notify()
+
+    def close(self):
+        self.done = True
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def __aiter__(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        index = 0
+        while True:
+            while index < len(self.pages):
+                yield self.pages[index]
+                index += 1
+            if self.done:
+                return
+            await self._changed.wait()
+
+class ReleaseCache:
+    """
+    mora 新曲列表缓存，按 (地区, 日期) 保存在 DATA_PATH/mora/releases 下
+
+    已经结束的日期在结束之后拉取过一次就不会再变化，直接读取缓存；
+    当天的数据设置较短的有效期，过期后先返回旧数据并在后台刷新。
+    """
+
+    def __init__(self, path: Path = release_cache_path):
+        self.path = path
+        self._memory: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._inflight: Dict[Tuple[str, str], _PageStream] = {}
+
+    @staticmethod
+    def _key(target_date: datetime.date, region: str) -> Tuple[str, str]:
+        return (region.lower(), target_date.strftime("%Y%m%d"))
+
+    def _file(self, key: Tuple[str, str]) -> Path:
+        return self.path / f"{key[0]}_{key[1]}.json"
+
+    @staticmethod
+    def is_final(target_date: datetime.date, fetched_at: float) -> bool:
+        """在目标日期（日本时间）结束之后拉取的数据视为不会再变化"""
+        day_end = JP_TIMEZONE.localize(datetime.combine(target_date + timedelta(days=1), datetime.min.time()))
+        return fetched_at >= day_end.timestamp()
+
+    def _load(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        if key in self._memory:
+            return self._memory[key]
+        file = self._file(key)
+        if not file.exists():
+            return None
+        try:
+            with open(file, "r", encoding="utf8") as f:
+                entry = json.load(f)
+        except Exception as e:
+            logger.warning(f"读取新曲缓存 {file.name} 失败: {e}")
+            return None
+        entry["albums"] = to_albums(entry["albums"])
+        self._memory[key] = entry
+        return entry
+
+    def _save(self, key: Tuple[str, str], entry: Dict[str, Any]):
+        self._memory[key] = entry
+        self.path.mkdir(parents=True, exist_ok=True)
+        file = self._file(key)
+        tmp_file = file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf8") as f:
+            json.dump(entry, f, ensure_ascii=False, default=dict)
+        tmp_file.replace(file)
+
+    def lookup(self, target_date: datetime.date, region: str) -> Optional[List[Dict[str, Any]]]:
+        """读取未过期的缓存，过期或不存在时返回 None"""
+        entry = self._load(self._key(target_date, region))
+        if entry and (entry.get("final") or time.time() - entry["fetched_at"] < RELEASE_TTL):
+            return entry["albums"]
+        return None
+
+    async def store(self, target_date: datetime.date, region: str, albums: List[Dict[str, Any]], fetched_at: Optional[float] = None):
+        """
+        写入新曲列表，空列表不写入
+
+        :param target_date: 查询的日期
+        :param region: 地区代码
+        :param albums: 未去重的专辑字典列表
+        :param fetched_at: 开始拉取的时间，默认为当前时间
+        """
+        if not albums:
+            return
+        if fetched_at is None:
+            fetched_at = time.time()
+        entry = {
+            "fetched_at": fetched_at,
+            "final": self.is_final(target_date, fetched_at),
+            "albums": albums,
+        }
+        try:
+            self._save(self._key(target_date, region), entry)
+        except Exception as e:
+            logger.warning(f"写入新曲缓存失败: {e}")
+        # 拉取过的新曲同时写入历史归档
+        await release_archive.add(region.lower(), albums)
+
+    def _cached(
+        self,
+        key: Tuple[str, str],
+        target_date: datetime.date,
+        fetcher: Callable[[List[int]], AsyncIterator[List[Dict[str, Any]]]],
+        force_refresh: bool
+    ) -> Optional[List[Dict[str, Any]]]:
+        """读取可以直接返回的缓存，过期但未超过 RELEASE_MAX_STALE 时同时在后台刷新"""
+        entry = None if force_refresh else self._load(key)
+        if entry:
+            if entry.get("final"):
+                metrics.inc("release_cache_total", result="hit")
+                return entry["albums"]
+            age = time.time() - entry["fetched_at"]
+            if age < RELEASE_TTL:
+                metrics.inc("release_cache_total", result="hit")
+                return entry["albums"]
+            if age < RELEASE_MAX_STALE:
+                # 先返回旧数据，后台刷新
+                metrics.inc("release_cache_total", result="stale")
+                self._refresh(key, target_date, fetcher)
+                return entry["albums"]
+        metrics.inc("release_cache_total", result="miss")
+        return None
+
+    async def get(
+        self,
+        target_date: datetime.date,
+        region: str,
+        fetcher: Callable[[List[int]], AsyncIterator[List[Dict[str, Any]]]],
+        force_refresh: bool = False,
+        failed_pages: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        读取缓存的新曲列表，缓存缺失或过期时调用 fetcher 拉取
+
+        :param target_date: 要查询的日期
+        :param region: 地区代码
+        :param fetcher: 逐页拉取数据的函数，参数为记录失败页码的列表
+        :param force_refresh: 是否忽略缓存强制拉取
+        :param failed_pages: 传入列表时记录本次拉取失败的页码，返回缓存时保持为空
+        :return: 未去重的专辑字典列表
+        """
+        key = self._key(target_date, region)
+        albums = self._cached(key, target_date, fetcher, force_refresh)
+        if albums is not None:
+            return albums
+        stream = self._refresh(key, target_date, fetcher)
+        albums = await asyncio.shield(stream.task)
+        if failed_pages is not None:
+            failed_pages.extend(stream.failed_pages)
+        return albums
+
+    async def iter_pages(
+        self,
+        target_date: datetime.date,
+        region: str,
+        fetcher: Callable[[List[int]], AsyncIterator[List[Dict[str, Any]]]]
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        逐页读取新曲列表，缓存可用时一次返回全部专辑，
+        否则与同时进行的拉取共用同一次请求，每拉取到一页就返回该页
+
+        :param target_date: 要查询的日期
+        :param region: 地区代码
+        :param fetcher: 同 get
+        """
+        key = self._key(target_date, region)
+        albums = self._cached(key, target_date, fetcher, False)
+        if albums is not None:
+            yield albums
+            return
+        stream = self._refresh(key, target_date, fetcher)
+        streamed = False
+        async for page_albums in stream:
+            streamed = streamed or bool(page_albums)
+            yield page_albums
+        albums = await asyncio.shield(stream.task)
+        if not streamed and albums:
+            # 本次没有拉取到专辑，返回之前保存的旧数据
+            yield albums
+
+    def _refresh(
+        self,
+        key: Tuple[str, str],
+        target_date: datetime.date,
+        fetcher: Callable[[List[int]], AsyncIterator[List[Dict[str, Any]]]]
+    ) -> _PageStream:
+        # 同一个 (地区, 日期) 同时只拉取一次，其余请求复用结果
+        stream = self._inflight.get(key)
+        if stream is None:
+            stream = _PageStream()
+            stream.task = asyncio.create_task(self._do_refresh(key, target_date, fetcher, stream))
+            self._inflight[key] = stream
+            stream.task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return stream
+
+    async def _do_refresh(
+        self,
+        key: Tuple[str, str],
+        target_date: datetime.date,
+        fetcher: Callable[[List[int]], AsyncIterator[List[Dict[str, Any]]]],
+        stream: _PageStream
+    ) -> List[Dict[str, Any]]:
+        fetched_at = time.time()
+        albums = []
+        failed_pages = stream.failed_pages
+        try:
+            async for page_albums in fetcher(failed_pages):
+                albums.extend(page_albums)
+                stream.append(page_albums)
+        finally:
+            stream.close()
+        if not albums:
+            # 拉取失败或数据尚未发布时不写入缓存，有旧数据则继续使用旧数据
+            old_entry = self._memory.get(key)
+            return old_entry["albums"] if old_entry else albums
+        if failed_pages:
+            # 有分页拉取失败时只返回本次拉取到的部分，不写入缓存，避免缺页的列表被当作最终结果保存
+            metrics.inc("release_fetch_incomplete_total", region=key[0])
+            logger.warning(f"{key[0]} {key[1]} 的新曲有分页拉取失败，本次结果不写入缓存")
+            return albums
+        await self.store(target_date, key[0], albums, fetched_at)
+        return albums
+
+release_cache = ReleaseCache()
+
+class CoverCache:
+    """
+    专辑封面缓存，按图片地址的哈希保存
+
+    内存中按总字节数做 LRU 淘汰，磁盘保存在 DATA_PATH/mora/covers 下，
+    超过容量时按最近访问时间删除最旧的文件；磁盘扫描和读写都在线程中进行。
+    """
+
+    def __init__(
+        self,
+        path: Path = cover_cache_path,
+        memory_limit: int = COVER_MEMORY_LIMIT,
+        disk_limit: int = COVER_DISK_LIMIT,
+        name: str = "cover"
+    ):
+        self.path = path
+        self.name = name
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        # 磁盘文件名 -> 文件大小，按最近访问顺序排列，首次使用时扫描目录
+        self._disk: Optional["OrderedDict[str, int]"] = None
+        self._disk_size = 0
+        self._scan_lock = asyncio.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(url.encode("utf8")).hexdigest()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """命中统计"""
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_bytes": self._memory_size,
+            "disk_bytes": self._disk_size,
+        }
+
+    def _scan_disk(self) -> "OrderedDict[str, int]":
+        self.path.mkdir(parents=True, exist_ok=True)
+        files = sorted(
+            (entry for entry in os.scandir(self.path) if entry.is_file() and not entry.name.endswith(".tmp")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        return OrderedDict((entry.name, entry.stat().st_size) for entry in files)
+
+    async def _disk_index(self) -> "OrderedDict[str, int]":
+        # 扫描目录在线程中进行，不阻塞事件循环，同时到来的请求只扫描一次
+        if self._disk is None:
+            async with self._scan_lock:
+                if self._disk is None:
+                    disk = await asyncio.to_thread(self._scan_disk)
+                    self._disk_size = sum(disk.values())
+                    self._disk = disk
+        return self._disk
+
+    @staticmethod
+    def _read_file(file: Path) -> bytes:
+        data = file.read_bytes()
+        os.utime(file)
+        return data
+
+    @staticmethod
+    def _write_file(file: Path, data: bytes):
+        tmp_file = file.with_suffix(".tmp")
+        tmp_file.write_bytes(data)
+        tmp_file.replace(file)
+
+    @staticmethod
+    def _unlink_files(files: List[Path]):
+        for file in files:
+            try:
+                file.unlink()
+            except OSError:
+                pass
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.memory_limit:
+            return
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_limit:
+            _, old_data = self._memory.popitem(last=False)
+            self._memory_size -= len(old_data)
+
+    async def get(self, url: str) -> Optional[bytes]:
+        """读取缓存的封面，未命中时返回 None"""
+        key = self._key(url)
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            metrics.inc("cover_cache_total", cache=self.name, result="memory_hit")
+            return data
+
+        disk = await self._disk_index()
+        if key in disk:
+            try:
+                data = await asyncio.to_thread(self._read_file, self.path / key)
+            except OSError:
+                size = disk.pop(key, None)
+                if size is not None:
+                    self._disk_size -= size
+            else:
+                if key in disk:
+                    disk.move_to_end(key)
+                self.disk_hits += 1
+                metrics.inc("cover_cache_total", cache=self.name, result="disk_hit")
+                self._remember(key, data)
+                return data
+
+        self.misses += 1
+        metrics.inc("cover_cache_total", cache=self.name, result="miss")
+        return None
+
+    async def put(self, url: str, data: bytes):
+        """写入封面缓存"""
+        key = self._key(url)
+        self._remember(key, data)
+
+        disk = await self._disk_index()
+        if key in disk:
+            return
+        try:
+            await asyncio.to_thread(self._write_file, self.path / key, data)
+        except OSError as e:
+            logger.warning(f"写入封面缓存失败: {e}")
+            return
+        if key in disk:
+            return
+        disk[key] = len(data)
+        self._disk_size += len(data)
+        old_files = []
+        while self._disk_size > self.disk_limit and len(disk) > 1:
+            old_key, old_size = disk.popitem(last=False)
+            self._disk_size -= old_size
+            old_files.append(self.path / old_key)
+        if old_files:
+            await asyncio.to_thread(self._unlink_files, old_files)
+
+cover_cache = CoverCache()
@@ -1,41 +1,112 @@
 import asyncio
 import aiohttp
+import hashlib
 import requests
 import time
-import json
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 
 from zhenxun.configs.config import BotConfig
+from zhenxun.services.log import logger
+from .album import parse_page
+from .cache import release_cache
+from .client import get_session
+from .metrics import metrics
 
-# 每次拉取的页数
+# 同时拉取的最大页数
 FETCH_PAGE_TIME = 5
 
 class MoraReleaseChecker:
     """用于获取Mora.jp上指定日期发布的所有专辑"""
     
     @staticmethod
-    async def fetch_page(session: aiohttp.ClientSession, region: str, page: int, timestamp: int) -> dict:
-        url = f"https://cf.mora.jp/contents/data/newrelease/web/newrelease/newRelease_{region}_{page:04d}.jsonp?_{timestamp}"
+    def page_url(region: str, page: int, timestamp: int) -> str:
+        return f"https://cf.mora.jp/contents/data/newrelease/web/newrelease/newRelease_{region}_{page:04d}.jsonp?_{timestamp}"
+
+    @staticmethod
+    async def fetch_page_if_changed(
+        session: aiohttp.ClientSession,
+        region: str,
+        page: int,
+        timestamp: int,
+        validators: Dict[str, str]
+    ) -> Optional[dict]:
+        """
+        带 ETag/If-Modified-Since 的条件请求，服务器不支持时按内容哈希判断
+
+        :param validators: 上次请求记录的校验信息，请求后原地更新
+        :return: 页面有变化时返回解析后的数据，未变化或失败时返回 None
+        """
+        url = MoraReleaseChecker.page_url(region, page, timestamp)
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        try:
+            with metrics.timer("fetch_page"):
+                async with session.get(url, headers=headers, proxy = BotConfig.system_proxy) as response:
+                    if response.status == 304:
+                        metrics.inc("pages_not_modified_total")
+                        return None
+                    if response.status != 200:
+                        metrics.inc("fetch_failures_total", reason=f"http_{response.status}")
+                        logger.warning(f"获取第{page}页失败，状态码：{response.status}")
+                        return None
+                    raw = await response.read()
+                    etag = response.headers.get("ETag", "")
+                    last_modified = response.headers.get("Last-Modified", "")
+            metrics.inc("pages_fetched_total")
+            metrics.inc("page_bytes_total", len(raw))
+
+            content_hash = hashlib.sha1(raw).hexdigest()
+            if content_hash == validators.get("hash"):
+                return None
+            data = parse_page(raw)
+        except Exception as e:
+            metrics.inc("fetch_failures_total", reason=type(e).__name__)
+            logger.warning(f"获取第{page}页时出错: {e}")
+            return None
+        # 解析成功后才更新校验信息，解析失败的响应下次仍会重新请求
+        validators["etag"] = etag
+        validators["last_modified"] = last_modified
+        validators["hash"] = content_hash
+        return data
+
+    @staticmethod
+    async def fetch_page(session: aiohttp.ClientSession, region: str, page: int, timestamp: int) -> Optional[dict]:
+        """
+        拉取并解析一页新曲列表
+
+        :return: 解析后的数据，请求或解析失败时返回 None
+        """
+        url = MoraReleaseChecker.page_url(region, page, timestamp)
         try:
-            print(f"url: {url}")
-            async with session.get(url, proxy = BotConfig.system_proxy) as response:
-                if response.status != 200:
-                    print(f"获取第{page}页失败，状态码：{response.status}")
-                    return {}
-
-                text = await response.text()
-                json_str = text.replace("moraCallback(", "")[:-2]  # 去除回调函数包装
-                return json.loads(json_str)
+            logger.debug(f"url: {url}")
+            with metrics.timer("fetch_page"):
+                async with session.get(url, proxy = BotConfig.system_proxy) as response:
+                    if response.status != 200:
+                        metrics.inc("fetch_failures_total", reason=f"http_{response.status}")
+                        logger.warning(f"获取第{page}页失败，状态码：{response.status}")
+                        return None
+
+                    raw = await response.read()
+            metrics.inc("pages_fetched_total")
+            metrics.inc("page_bytes_total", len(raw))
+            with metrics.timer("parse_page"):
+                return parse_page(raw)
         except Exception as e:
-            print(f"获取第{page}页时出错: {e}")
-            return {}
+            metrics.inc("fetch_failures_total", reason=type(e).__name__)
+            logger.warning(f"获取第{page}页时出错: {e}")
+            return None
 
     @staticmethod
     async def get_albums(
         target_date: datetime.date,
         region: Optional[str] = None,
-        deduplicate: bool = True
+        deduplicate: bool = True,
+        force_refresh: bool = False,
+        failed_pages: Optional[List[int]] = None
     ) -> List[Dict[str, Any]]:
         """
         获取指定日期发布的所有专辑
@@ -43,63 +114,235 @@ class MoraReleaseChecker:
         :param target_date: 要查询的日期
         :param region: 地区代码，None则使用默认值 'jpn'
         :param deduplicate: 是否去重
+        :param force_refresh: 是否忽略缓存强制拉取
+        :param failed_pages: 传入列表时记录拉取失败的页码，不为空说明结果不完整
         :return: 专辑字典列表
         """
         if region is None:
             region = "jpn"
 
-        target_date_str = target_date.strftime("%Y/%m/%d") + " 00:00:00"
-        timestamp = int(time.mktime(target_date.timetuple())) * 1000
-
-        new_release_list = []
-        page = 1
-        has_more_pages = True
-
-        async with aiohttp.ClientSession() as session:
-            while has_more_pages:
-                tasks = [MoraReleaseChecker.fetch_page(session, region, p, timestamp) for p in range(page, page + FETCH_PAGE_TIME)]
-                results = await asyncio.gather(*tasks)
-
-                current_data = []
-                for data in results:
-                    if not data or "newReleaseList" not in data:
-                        continue
-                    current_data.extend(data["newReleaseList"])
-
-                # 过滤目标日期的专辑
-                current_page_albums = [
-                    album for album in current_data
-                    if album["dispStartDate"] == target_date_str
-                ]
-                new_release_list.extend(current_page_albums)
-
-                # 检查是否还有下一页
-                last_album = current_data[-1] if current_data else None
-                max_page = max((data.get("splitFileCnt", 0) for data in results if data), default=0)
-
-                if any(album["dispStartDate"] < target_date_str for album in current_data):
-                    has_more_pages = False
-                elif page >= max_page:
-                    has_more_pages = False
+        new_release_list = await release_cache.get(
+            target_date,
+            region,
+            lambda failed_pages: MoraReleaseChecker._iter_fetch_pages(target_date, target_date, region, failed_pages),
+            force_refresh=force_refresh,
+            failed_pages=failed_pages
+        )
+
+        if deduplicate:
+            return MoraReleaseChecker.deduplicate(new_release_list)
+
+        return new_release_list
+
+    @staticmethod
+    async def get_albums_range(
+        start_date: datetime.date,
+        end_date: datetime.date,
+        region: Optional[str] = None,
+        deduplicate: bool = True
+    ) -> Dict[datetime.date, List[Dict[str, Any]]]:
+        """
+        获取日期范围内每天发布的所有专辑，整个范围只拉取一遍分页
+
+        :param start_date: 开始日期
+        :param end_date: 结束日期（包含）
+        :param region: 地区代码，None则使用默认值 'jpn'
+        :param deduplicate: 是否去重
+        :return: 日期 -> 专辑字典列表，按日期从早到晚排列
+        """
+        if region is None:
+            region = "jpn"
+
+        dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        result: Dict[datetime.date, List[Dict[str, Any]]] = {}
+        for date in dates:
+            cached = release_cache.lookup(date, region)
+            if cached is None:
+                break
+            result[date] = cached
+        else:
+            # 全部命中缓存
+            return {date: MoraReleaseChecker.deduplicate(albums) if deduplicate else albums for date, albums in result.items()}
+
+        fetched_at = time.time()
+        result = {date: [] for date in dates}
+        failed_pages: List[int] = []
+        async for page_albums in MoraReleaseChecker._iter_fetch_pages(start_date, end_date, region, failed_pages):
+            for album in page_albums:
+                date = datetime.strptime(album["dispStartDate"][:10], "%Y/%m/%d").date()
+                if date in result:
+                    result[date].append(album)
+
+        for date, albums in result.items():
+            # 有分页拉取失败时无法确定缺了哪几天，整个范围都不写入缓存
+            if not failed_pages:
+                await release_cache.store(date, region, albums, fetched_at)
+            if deduplicate:
+                result[date] = MoraReleaseChecker.deduplicate(albums)
+        return result
+
+    @staticmethod
+    def album_identifier(album: Dict[str, Any]) -> Tuple[str, str, str, int]:
+        """专辑的唯一标识，用于去重"""
+        return (
+            album["artistName"],
+            album["dispStartDate"],
+            album["title"],
+            album["trackCount"]
+        )
+
+    @staticmethod
+    def deduplicate(albums: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """按专辑标识去重，保留第一次出现的专辑"""
+        seen = set()
+        deduplicated_list = []
+
+        for album in albums:
+            identifier = MoraReleaseChecker.album_identifier(album)
+            if identifier not in seen:
+                seen.add(identifier)
+                deduplicated_list.append(album)
+
+        return deduplicated_list
+
+    @staticmethod
+    async def iter_album_pages(
+        target_date: datetime.date,
+        region: Optional[str] = None,
+        deduplicate: bool = True
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        逐页返回指定日期发布的专辑，每解析完一页就立即返回该页的结果
+
+        缓存可用时一次返回全部专辑，否则通过 release_cache 边拉取边返回，
+        与同时进行的查询和推送共用同一次拉取。
+        
+        :param target_date: 要查询的日期
+        :param region: 地区代码，None则使用默认值 'jpn'
+        :param deduplicate: 是否去重
+        """
+        if region is None:
+            region = "jpn"
+
+        seen = set()
+        async for page_albums in release_cache.iter_pages(
+            target_date,
+            region,
+            lambda failed_pages: MoraReleaseChecker._iter_fetch_pages(target_date, target_date, region, failed_pages)
+        ):
+            if deduplicate:
+                batch = []
+                for album in page_albums:
+                    identifier = MoraReleaseChecker.album_identifier(album)
+                    if identifier not in seen:
+                        seen.add(identifier)
+                        batch.append(album)
+            else:
+                batch = page_albums
+            if batch:
+                yield batch
+
+    @staticmethod
+    async def iter_albums(
+        target_date: datetime.date,
+        region: Optional[str] = None,
+        deduplicate: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        逐个返回指定日期发布的专辑，参数同 iter_album_pages
+        """
+        async for page_albums in MoraReleaseChecker.iter_album_pages(target_date, region, deduplicate):
+            for album in page_albums:
+                yield album
+
+    @staticmethod
+    def _page_albums(data: dict) -> List[Dict[str, Any]]:
+        return data.get("newReleaseList", []) if data else []
+
+    @staticmethod
+    def _page_min_date(data: dict) -> Optional[str]:
+        """页面中最早的发布日期，获取失败时为 None"""
+        return min((album["dispStartDate"] for album in MoraReleaseChecker._page_albums(data)), default=None)
+
+    @staticmethod
+    async def _iter_fetch_pages(
+        start_date: datetime.date,
+        end_date: datetime.date,
+        region: str,
+        failed_pages: Optional[List[int]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        从 mora.jp 逐页拉取指定日期范围内发布的专辑（不经过缓存，不去重）
+
+        新曲列表按发布日期从新到旧分页，先读取第一页得到总页数，
+        再二分查找结束日期开始的页，之后按顺序并发拉取，遇到早于开始日期的页即停止。
+
+        :param failed_pages: 传入列表时记录拉取失败的页码，有失败时结果不完整
+        """
+        if failed_pages is None:
+            failed_pages = []
+        start_date_str = start_date.strftime("%Y/%m/%d") + " 00:00:00"
+        end_date_str = end_date.strftime("%Y/%m/%d") + " 00:00:00"
+        timestamp = int(time.mktime(end_date.timetuple())) * 1000
+
+        session = get_session()
+        pages: Dict[int, dict] = {}
+
+        async def get_page(page: int) -> Optional[dict]:
+            # 只缓存成功的页，二分查找时失败的页在顺序拉取时会重新请求
+            if page not in pages:
+                data = await MoraReleaseChecker.fetch_page(session, region, page, timestamp)
+                if data is None:
+                    return None
+                pages[page] = data
+            return pages[page]
+
+        first_page = await get_page(1)
+        if first_page is None:
+            failed_pages.append(1)
+            return
+        max_page = first_page.get("splitFileCnt", 0)
+
+        # 二分查找第一个包含不晚于结束日期专辑的页，获取失败的页按满足条件处理，保证不会漏页
+        start_page = 1
+        first_min_date = MoraReleaseChecker._page_min_date(first_page)
+        if first_min_date is not None and first_min_date > end_date_str:
+            low, high = 2, max(max_page, 1)
+            start_page = high
+            while low <= high:
+                middle = (low + high) // 2
+                min_date = MoraReleaseChecker._page_min_date(await get_page(middle))
+                if min_date is None or min_date <= end_date_str:
+                    start_page = middle
+                    high = middle - 1
                 else:
-                    page += FETCH_PAGE_TIME  # 下一轮
-
-        # 去重逻辑
-        if deduplicate and new_release_list:
-            seen = set()
-            deduplicated_list = []
-
-            for album in new_release_list:
-                identifier = (
-                    album["artistName"],
-                    album["dispStartDate"],
-                    album["title"],
-                    album["trackCount"]
-                )
-                if identifier not in seen:
-                    seen.add(identifier)
-                    deduplicated_list.append(album)
-
-            return deduplicated_list
-
-        return new_release_list
\ No newline at end of file
+                    low = middle + 1
+
+        # 从起始页开始按顺序处理，日期范围延续到下一页时逐步扩大并发窗口，最多同时拉取 FETCH_PAGE_TIME 页
+        in_flight: Dict[int, asyncio.Task] = {}
+        window = 1
+        page = start_page
+        try:
+            while page <= max(max_page, start_page):
+                task = in_flight.pop(page, None)
+                data = await task if task else await get_page(page)
+                if data is None:
+                    failed_pages.append(page)
+
+                page_albums = MoraReleaseChecker._page_albums(data)
+                finished = any(album["dispStartDate"] < start_date_str for album in page_albums)
+                if not finished:
+                    # 先发出后续页的请求，再把本页结果交给调用方处理
+                    for next_page in range(page + 1, min(page + 1 + window, max_page + 1)):
+                        if next_page not in in_flight:
+                            in_flight[next_page] = asyncio.create_task(get_page(next_page))
+                    window = min(window * 2, FETCH_PAGE_TIME)
+
+                yield [album for album in page_albums if start_date_str <= album["dispStartDate"] <= end_date_str]
+                if finished:
+                    break
+                page += 1
+        finally:
+            # 已经越过开始日期，取消剩余的请求
+            for task in in_flight.values():
+                task.cancel()
@@ -0,0 +1,56 @@
+from typing import Optional
+
+import aiohttp
+import nonebot
+
+from zhenxun.services.log import logger
+
+# 连接池总连接数上限
+CONNECTION_LIMIT = 64
+# 单个主机的连接数上限
+CONNECTION_LIMIT_PER_HOST = 16
+# 空闲连接保持时间，单位秒
+KEEPALIVE_TIMEOUT = 30
+# DNS 缓存时间，单位秒
+DNS_CACHE_TTL = 300
+# 单次请求总超时时间，单位秒
+REQUEST_TIMEOUT = 30
+# 建立连接超时时间，单位秒
+CONNECT_TIMEOUT = 10
+
+_session: Optional[aiohttp.ClientSession] = None
+
+def get_session() -> aiohttp.ClientSession:
+    """获取插件共用的 aiohttp 会话，不存在或已关闭时重新创建"""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            limit_per_host=CONNECTION_LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+        )
+    return _session
+
+async def close_session():
+    """关闭插件共用的 aiohttp 会话"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+driver = nonebot.get_driver()
+
+@driver.on_startup
+async def _():
+    get_session()
+    logger.info("mora 连接池已创建")
+
+@driver.on_shutdown
+async def _():
+    await close_session()
+    logger.info("mora 连接池已关闭")
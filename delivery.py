@@ -0,0 +1,119 @@
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from zhenxun.configs.path_config import DATA_PATH
+from zhenxun.services.log import logger
+
+from .checker import MoraReleaseChecker
+
+delivery_path: Path = DATA_PATH / "mora/delivered"
+
+# 当天补充推送的检查间隔，单位分钟，0 为关闭
+RECHECK_INTERVAL = 30
+# 推送记录保留天数
+DELIVERY_KEEP_DAYS = 7
+
+class DeliveryLog:
+    """
+    每天已推送专辑的记录，按日期保存在 DATA_PATH/mora/delivered 下
+
+    每次推送的新专辑作为一个批次保存标识，
+    每个场景只记录已推送到的批次序号，避免为每个场景重复保存整份专辑列表。
+    """
+
+    def __init__(self, path: Path = delivery_path):
+        self.path = path
+        self._records: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _date_key(target_date: datetime.date) -> str:
+        return target_date.strftime("%Y%m%d")
+
+    @staticmethod
+    def scene_key(id: str, type: int) -> str:
+        return f"{int(type)}:{id}"
+
+    def _file(self, date_key: str) -> Path:
+        return self.path / f"{date_key}.json"
+
+    def _load(self, target_date: datetime.date) -> Dict[str, Any]:
+        date_key = self._date_key(target_date)
+        record = self._records.get(date_key)
+        if record is not None:
+            return record
+        record = {"batches": [], "scenes": {}}
+        file = self._file(date_key)
+        if file.exists():
+            try:
+                with open(file, "r", encoding="utf8") as f:
+                    record = json.load(f)
+            except Exception as e:
+                logger.warning(f"读取推送记录 {file.name} 失败: {e}")
+        record["_ids"] = {tuple(identifier) for batch in record["batches"] for identifier in batch}
+        self._records[date_key] = record
+        return record
+
+    def save(self, target_date: datetime.date):
+        """写入指定日期的推送记录，并清理过期记录"""
+        date_key = self._date_key(target_date)
+        record = self._load(target_date)
+        self.path.mkdir(parents=True, exist_ok=True)
+        file = self._file(date_key)
+        tmp_file = file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf8") as f:
+            json.dump({"batches": record["batches"], "scenes": record["scenes"]}, f, ensure_ascii=False)
+        tmp_file.replace(file)
+
+        expire_key = self._date_key(target_date - timedelta(days=DELIVERY_KEEP_DAYS))
+        for old_file in self.path.glob("*.json"):
+            if old_file.stem < expire_key:
+                old_file.unlink(missing_ok=True)
+                self._records.pop(old_file.stem, None)
+
+    def has_push(self, target_date: datetime.date) -> bool:
+        """指定日期是否已经进行过推送"""
+        return bool(self._load(target_date)["scenes"])
+
+    def new_albums(self, target_date: datetime.date, albums: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """筛选出指定日期还没有推送过的专辑"""
+        ids = self._load(target_date)["_ids"]
+        return [album for album in albums if MoraReleaseChecker.album_identifier(album) not in ids]
+
+    def add_batch(self, target_date: datetime.date, albums: List[Dict[str, Any]]) -> int:
+        """
+        记录一批新推送的专辑
+
+        :return: 批次序号
+        """
+        record = self._load(target_date)
+        identifiers = [
+            identifier for identifier in dict.fromkeys(MoraReleaseChecker.album_identifier(album) for album in albums)
+            if identifier not in record["_ids"]
+        ]
+        record["batches"].append([list(identifier) for identifier in identifiers])
+        record["_ids"].update(identifiers)
+        return len(record["batches"]) - 1
+
+    def latest_batch(self, target_date: datetime.date) -> int:
+        """最新的批次序号，没有批次时为 -1"""
+        return len(self._load(target_date)["batches"]) - 1
+
+    def mark(self, target_date: datetime.date, id: str, type: int, batch: int):
+        """记录场景已推送到指定批次"""
+        self._load(target_date)["scenes"][self.scene_key(id, type)] = batch
+
+    def delivered_batch(self, target_date: datetime.date, id: str, type: int) -> Optional[int]:
+        """场景已推送到的批次序号，当天没有推送过时为 None"""
+        return self._load(target_date)["scenes"].get(self.scene_key(id, type))
+
+    def delivered(self, target_date: datetime.date, id: str, type: int) -> Set[Tuple[str, str, str, int]]:
+        """场景在指定日期已推送过的专辑标识"""
+        record = self._load(target_date)
+        batch = self.delivered_batch(target_date, id, type)
+        if batch is None:
+            return set()
+        return {tuple(identifier) for batch_ids in record["batches"][:batch + 1] for identifier in batch_ids}
+
+delivery_log = DeliveryLog()
@@ -0,0 +1,186 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+from nonebot.exception import NetworkError
+
+from zhenxun.services.log import logger
+from zhenxun.utils.platform import PlatformUtils
+
+from .metrics import metrics
+
+# 每个机器人每秒最多发送的消息数
+SEND_RATE = 2
+# 每个机器人允许的突发消息数
+SEND_BURST = 5
+# 全局同时发送的消息数上限
+SEND_CONCURRENCY = 4
+# 连接类错误的重试次数
+SEND_RETRY = 3
+# 重试的初始等待时间，单位秒，之后每次翻倍
+SEND_RETRY_DELAY = 2
+
+class TokenBucket:
+    """令牌桶限流器"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """取走一个令牌，令牌不足时等待"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class PushDispatcher:
+    """
+    推送消息发送器
+
+    每个机器人按令牌桶限流，全局限制同时发送的数量，
+    同一个目标的消息按提交顺序依次发送。
+    连接类错误按指数退避重试，退避期间不占用并发名额；
+    接口返回的失败（被踢出群、消息被拒绝等）不重试；
+    超时时消息可能已经送达，不重发，记为未确认。
+    """
+
+    def __init__(
+        self,
+        rate: float = SEND_RATE,
+        burst: int = SEND_BURST,
+        concurrency: int = SEND_CONCURRENCY,
+        retry: int = SEND_RETRY,
+        retry_delay: float = SEND_RETRY_DELAY
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.retry = retry
+        self.retry_delay = retry_delay
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._buckets: Dict[str, TokenBucket] = {}
+        # 每个目标一把锁保证消息顺序，记录排队数量以便清理
+        self._target_locks: Dict[Tuple[str, Any, Any], asyncio.Lock] = {}
+        self._target_pending: Dict[Tuple[str, Any, Any], int] = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        """清空发送统计"""
+        self.queued = 0
+        self.sending = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.uncertain = 0
+        self._started_at: Optional[float] = None
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """发送统计：排队数、发送中、成功、失败、重试次数、超时未确认数和每秒发送数"""
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0
+        return {
+            "queued": self.queued,
+            "sending": self.sending,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "uncertain": self.uncertain,
+            "throughput": self.sent / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def _bucket(self, bot) -> TokenBucket:
+        bucket = self._buckets.get(bot.self_id)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst)
+            self._buckets[bot.self_id] = bucket
+        return bucket
+
+    async def send(self, bot, user_id, group_id, message):
+        """
+        发送一条消息，按限流、并发和目标顺序排队
+
+        :param bot: 发送消息的机器人
+        :param user_id: 私聊目标ID
+        :param group_id: 群聊目标ID
+        :param message: 要发送的消息
+        """
+        if self._started_at is None:
+            self._started_at = time.monotonic()
+        key = (bot.self_id, user_id, group_id)
+        lock = self._target_locks.setdefault(key, asyncio.Lock())
+        self._target_pending[key] = self._target_pending.get(key, 0) + 1
+        self.queued += 1
+        try:
+            async with lock:
+                return await self._send_with_retry(bot, user_id, group_id, message)
+        finally:
+            self._target_pending[key] -= 1
+            if self._target_pending[key] == 0:
+                del self._target_pending[key]
+                del self._target_locks[key]
+
+    @staticmethod
+    def is_ambiguous(e: Exception) -> bool:
+        """请求已经发出但没有等到结果，消息可能已经送达"""
+        # OneBot 适配器调用接口超时时抛出内容包含 timeout 的 NetworkError
+        return isinstance(e, asyncio.TimeoutError) or (isinstance(e, NetworkError) and "timeout" in str(e).lower())
+
+    @staticmethod
+    def is_transient(e: Exception) -> bool:
+        """连接类错误，消息没有发出，可以重试"""
+        return isinstance(e, (NetworkError, aiohttp.ClientError, ConnectionError))
+
+    async def _send_with_retry(self, bot, user_id, group_id, message):
+        queued = True
+        try:
+            for attempt in range(self.retry + 1):
+                await self._bucket(bot).acquire()
+                async with self._semaphore:
+                    if queued:
+                        queued = False
+                        self.queued -= 1
+                    self.sending += 1
+                    try:
+                        with metrics.timer("send_message"):
+                            result = await PlatformUtils.send_message(bot=bot,
+                                                                      user_id=user_id,
+                                                                      group_id=group_id,
+                                                                      message=message)
+                        self.sent += 1
+                        metrics.inc("sends_total")
+                        return result
+                    except Exception as e:
+                        metrics.inc("send_failures_total", reason=type(e).__name__)
+                        error = e
+                    finally:
+                        self.sending -= 1
+
+                # 已经释放并发名额，退避等待时不影响其他目标
+                if self.is_ambiguous(error):
+                    self.uncertain += 1
+                    metrics.inc("sends_uncertain_total")
+                    logger.warning(f"发送消息到 {group_id or user_id} 超时，消息可能已送达，不再重发: {error}")
+                    return None
+                if not self.is_transient(error) or attempt >= self.retry:
+                    self.failed += 1
+                    metrics.inc("sends_dropped_total")
+                    raise error
+                self.retried += 1
+                delay = self.retry_delay * (2 ** attempt) * (1 + random.random() / 2)
+                logger.warning(f"发送消息到 {group_id or user_id} 失败: {error}，{delay:.1f} 秒后重试")
+                await asyncio.sleep(delay)
+        finally:
+            if queued:
+                self.queued -= 1
+
+push_dispatcher = PushDispatcher()
@@ -4,6 +4,7 @@ from nonebot_plugin_uninfo import Uninfo
 from zhenxun.utils.message import MessageUtils
 
 from .utility import *
+from .archive import release_archive
 
 # 关注艺人命令
 _follow_add_matcher = on_alconna(
@@ -36,6 +37,19 @@ async def follow_add_artist(session: Uninfo, arparma: Arparma):
     set_watch_artists(id, type, updated_artists)
     await MessageUtils.build_message(f"成功关注艺人：{artist_name}").send()
 
+    # 从历史归档中查找该艺人最近的专辑
+    try:
+        recent_albums = release_archive.artist_albums(artist_name)
+    except Exception as e:
+        # 历史专辑只是附加信息，查询失败不影响关注结果
+        logger.warning(f"查询 {artist_name} 的历史专辑失败: {e}")
+        return
+    if recent_albums:
+        msg = [f"{artist_name} 最近的专辑：\n"]
+        for album in recent_albums:
+            msg.append(f"{album['dispStartDate'][:10]} 《{album['title']}》- {album['artistName']}，共{album['trackCount']}首曲子\n")
+        await MessageUtils.build_message(msg).send()
+
 # 取消关注艺人命令
 _follow_remove_matcher = on_alconna(
     Alconna("mora取消关注", Args["artist", str]),
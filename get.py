@@ -1,5 +1,6 @@
 import asyncio
 import nonebot
+from nonebot.adapters import Bot
 from nonebot.rule import to_me
 from nonebot_plugin_alconna import Alconna, Args, Arparma, on_alconna
 from nonebot_plugin_uninfo import Uninfo
@@ -12,11 +13,17 @@ from zhenxun.utils.enum import PluginType
 from zhenxun.utils.message import MessageUtils
 
 from datetime import datetime, timedelta
+from typing import AsyncIterator
 import pytz
 
-from zhenxun.utils.platform import PlatformUtils
-
 from .utility import *
+from .delivery import RECHECK_INTERVAL, delivery_log
+from .dispatcher import push_dispatcher
+from .job import PushJob, push_jobs
+from .metrics import metrics
+from .push import PushPlanner, get_prewarmed, start_prewarm
+from .roster import bot_roster
+from .watcher import release_watcher
 
 __plugin_meta__ = PluginMetadata(
     name="mora推送",
@@ -28,6 +35,7 @@ __plugin_meta__ = PluginMetadata(
         mora新曲               - 查询今日日本地区新曲
         mora新曲 2025/5/3      - 查询指定日期的日本新曲
         mora新曲 2025/5/3 int  - 查询指定日期的国际新曲
+        mora新曲 2025/5/1-2025/5/7 jpn,int - 查询日期范围内多个地区的新曲
         mora关注 艺人名         - 添加艺人到关注列表
         mora取消关注 艺人名     - 从关注列表移除艺人
         mora关注列表           - 查看当前关注的艺人列表
@@ -38,6 +46,9 @@ __plugin_meta__ = PluginMetadata(
         mora拉黑移除 艺人名   - 取消添加黑名单
         mora拉黑列表          - 查看当前黑名单艺人列表
 
+        mora搜索 关键词       - 在已拉取过的新曲中搜索专辑名、艺人名和简介
+        mora状态              - 查看上次推送各阶段耗时和统计（仅超级用户）
+
     注意事项：
         - 默认使用日本时区（UTC+9）
         - 区域参数不区分大小写，支持 jpn / int 等格式
@@ -58,6 +69,9 @@ __plugin_meta__ = PluginMetadata(
             Command(command="mora拉黑添加"),
             Command(command="mora拉黑移除"),
             Command(command="mora拉黑列表"),
+
+            Command(command="mora搜索 [keyword]"),
+            Command(command="mora状态"),
         ],
     ).to_dict(),
 )
@@ -74,9 +88,29 @@ _matcher = on_alconna(
 )
 
 @_matcher.handle()
-async def _(session: Uninfo, arparma: Arparma):
+async def _(bot: Bot, session: Uninfo, arparma: Arparma):
     target = arparma.query[str]("target") or ""
     region = arparma.query[str]("region") or "jpn"
+    regions = [r.strip().lower() for r in region.split(",") if r.strip()]
+
+    range_match = DATE_RANGE_REGEX.match(target)
+    if range_match or len(regions) > 1:
+        if range_match:
+            start_date = parse_date_str(range_match.group(1))
+            end_date = parse_date_str(range_match.group(2))
+        elif DATE_REGEX.match(target):
+            start_date = end_date = parse_date_str(target)
+        elif target == '':
+            start_date = end_date = datetime.now(pytz.timezone("Asia/Tokyo")).date()
+        else:
+            await MessageUtils.build_message("请输入有效指令，如：mora新曲 2025/5/1-2025/5/7 jpn,int").finish()
+            return
+        if end_date < start_date or (end_date - start_date).days >= MAX_QUERY_DAYS:
+            await MessageUtils.build_message(f"日期范围无效，最多查询 {MAX_QUERY_DAYS} 天").finish()
+            return
+        logger.info(f"查询日期：{start_date} - {end_date}，区域：{regions}")
+        await mora_get_range(bot, session, start_date, end_date, regions)
+        return
 
     if DATE_REGEX.match(target):
         query_date = parse_date_str(target)
@@ -89,55 +123,149 @@ async def _(session: Uninfo, arparma: Arparma):
         return
 
     logger.info(f"查询日期：{query_date}，区域：{region}")
-    await mora_get(session, arparma, query_date, region)
+    await mora_get(bot, session, arparma, query_date, region)
 
 async def send_message(albums: List[Dict[str, Any]],
                        target_date: datetime.date,
                        user_id,
                        group_id,
-                       type: SceneType): 
-    bot = nonebot.get_bot()
-    await PlatformUtils.send_message(bot=bot,
-                                     user_id=user_id,
-                                     group_id=group_id,
-                                     message=MessageUtils.build_message("=== {date} 发布了 {len} 张专辑 ===\n".strip().format(date=get_date_str(target_date), len=len(albums))))
-    blacklist_artist = get_blacklist_artists(user_id, type) if type == SceneType.PRIVATE else get_blacklist_artists(group_id, type)
-    albums = filter_albums(albums, blacklist_artist)
-    watch_artists = get_watch_artists(user_id, type) if type == SceneType.PRIVATE else get_watch_artists(group_id, type)
-    for result_info in await MoraHelper.get_watch_artists_albums(albums, watch_artists):
-        await PlatformUtils.send_message(bot=bot,
-                                         user_id=user_id,
-                                         group_id=group_id,
-                                         message=MessageUtils.build_message(result_info))
-
-    all_albums_image: list = await MoraHelper.get_all_albums_image(albums, target_date)
-
-    await PlatformUtils.send_message(bot=bot,
-                                     user_id=user_id,
-                                     group_id=group_id,
-                                     message=MessageUtils.build_message(all_albums_image))
-
-async def mora_get(session: Uninfo, arparma: Arparma, query_date: datetime.date, region: str):
+                       type: SceneType,
+                       planner: Optional[PushPlanner] = None,
+                       region: str = "jpn",
+                       skip: int = 0,
+                       progress: Optional[Callable[[int], None]] = None,
+                       bot = None): 
+    """
+    :param skip: 跳过前几条已经送达的消息
+    :param progress: 每送达一条消息后以已送达的条数调用
+    :param bot: 发送消息的机器人，None 时使用默认机器人
+    """
+    if bot is None:
+        bot = nonebot.get_bot()
+    if planner is None:
+        planner = PushPlanner(albums, target_date, region, single_scene=True)
+    id = user_id if type == SceneType.PRIVATE else group_id
+    count = 0
+    async for message in planner.iter_messages(id, type):
+        count += 1
+        if count <= skip:
+            continue
+        await push_dispatcher.send(bot=bot,
+                                   user_id=user_id,
+                                   group_id=group_id,
+                                   message=message)
+        if progress is not None:
+            progress(count)
+
+async def send_message_stream(album_pages: AsyncIterator[List[Dict[str, Any]]],
+                              target_date: datetime.date,
+                              user_id,
+                              group_id,
+                              type: SceneType,
+                              region: str = "jpn",
+                              bot = None):
+    """
+    边拉取边准备：每拉取到一页就开始下载其中关注艺人专辑的封面，
+    全部拉取完成后依次发送总数、关注艺人的专辑和总表图片
+
+    :param bot: 发送消息的机器人，None 时使用默认机器人
+    """
+    if bot is None:
+        bot = nonebot.get_bot()
+    id = user_id if type == SceneType.PRIVATE else group_id
+    blacklist_filter = get_blacklist_filter(id, type)
+    watch_artists = get_watch_artists(id, type)
+    watch_names = [artist_info["name"] for artist_info in watch_artists]
+
+    albums = []
+    covers: Dict[str, asyncio.Task] = {}
+    async for page_albums in album_pages:
+        albums.extend(page_albums)
+        for matched_albums in ArtistMatcher(blacklist_filter.filter(page_albums)).match_many(watch_names).values():
+            for album in matched_albums:
+                url = f"{album['packageUrl']}{album['packageimage']}"
+                if url not in covers:
+                    covers[url] = asyncio.create_task(download_cover(url))
+
+    async def download(url: str) -> BytesIO:
+        # 优先使用拉取时已经开始下载的封面
+        task = covers.get(url)
+        if task is None:
+            return await download_cover(url)
+        return BytesIO((await task).getvalue())
+
+    try:
+        await push_dispatcher.send(bot=bot,
+                                   user_id=user_id,
+                                   group_id=group_id,
+                                   message=MessageUtils.build_message("=== {date} 发布了 {len} 张专辑 ===\n".strip().format(date=get_date_str(target_date), len=len(albums))))
+        # 同一艺人的专辑可能分布在多页，拉取完成后一次生成，每个艺人只发送一条消息
+        for result_info in await MoraHelper.get_watch_artists_albums(blacklist_filter.filter(albums), watch_artists, download=download):
+            await push_dispatcher.send(bot=bot,
+                                       user_id=user_id,
+                                       group_id=group_id,
+                                       message=MessageUtils.build_message(result_info))
+    finally:
+        for task in covers.values():
+            task.cancel()
+
+    all_albums_image: list = await MoraHelper.get_all_albums_image(blacklist_filter.filter(albums), target_date, region)
+    await push_dispatcher.send(bot=bot,
+                               user_id=user_id,
+                               group_id=group_id,
+                               message=MessageUtils.build_message(all_albums_image))
+
+async def mora_get(bot: Bot, session: Uninfo, arparma: Arparma, query_date: datetime.date, region: str):
     id = session.scene.id
     type: SceneType = session.scene.type
     try:
         await MessageUtils.build_message([f"正在获取 {get_date_str(query_date)} 的 mora 新专辑"]).send()
-        albums = await MoraReleaseChecker.get_albums(target_date = query_date, region = region)
         user_id = id if type == SceneType.PRIVATE else None
         group_id = id if type == SceneType.GROUP else None
         
-        # 调用send_message发送所有消息
-        await send_message(
-            albums=albums,
+        # 边拉取边发送所有消息
+        await send_message_stream(
+            album_pages=MoraReleaseChecker.iter_album_pages(target_date = query_date, region = region),
             target_date=query_date,
             user_id=user_id,
             group_id=group_id,
-            type=type
+            type=type,
+            region=region,
+            bot=bot
         )
         
     except Exception as e:
         await MessageUtils.build_message(f"获取mora新曲失败: {e}").send()
 
+async def mora_get_range(bot: Bot, session: Uninfo, start_date: datetime.date, end_date: datetime.date, regions: List[str]):
+    """查询日期范围内多个地区的新曲，每个地区只拉取一遍分页，各地区并行拉取"""
+    id = session.scene.id
+    type: SceneType = session.scene.type
+    try:
+        await MessageUtils.build_message([f"正在获取 {get_date_str(start_date)} - {get_date_str(end_date)} 的 mora 新专辑（{','.join(regions)}）"]).send()
+        region_results = await asyncio.gather(*[
+            MoraReleaseChecker.get_albums_range(start_date, end_date, region) for region in regions
+        ])
+        user_id = id if type == SceneType.PRIVATE else None
+        group_id = id if type == SceneType.GROUP else None
+
+        for region, albums_by_date in zip(regions, region_results):
+            if len(regions) > 1:
+                await MessageUtils.build_message(f"=== 地区：{region} ===").send()
+            for query_date, albums in albums_by_date.items():
+                await send_message(
+                    albums=albums,
+                    target_date=query_date,
+                    user_id=user_id,
+                    group_id=group_id,
+                    type=type,
+                    region=region,
+                    bot=bot
+                )
+
+    except Exception as e:
+        await MessageUtils.build_message(f"获取mora新曲失败: {e}").send()
+
 _push_matcher = on_alconna(Alconna("mora接受订阅"), priority=5, block=True, rule=to_me())
 @_push_matcher.handle()
 async def push_new_albums(session: Uninfo, arparma: Arparma):
@@ -150,72 +278,238 @@ async def unpush_new_albums(session: Uninfo, arparma: Arparma):
     set_push_new_albums(session.scene.id, session.scene.type, False)
     await MessageUtils.build_message('成功取消mora推送订阅').send()
 
+async def get_push_targets() -> List[Tuple[Any, Optional[str], Optional[str], SceneType]]:
+    """
+    获取已连接机器人能送达的所有开启推送的目标，多个机器人都能送达时分摊到各个机器人
+
+    :return: (机器人, user_id, group_id, 类型) 列表
+    """
+    # 还没有获取过列表的机器人先获取一次，其余使用缓存
+    await bot_roster.refresh(only_missing=True)
+    targets = []
+    for bot, id, type in bot_roster.assign(get_auto_push_scenes()):
+        if type == SceneType.GROUP:
+            targets.append((bot, None, str(id), SceneType.GROUP))
+        elif type == SceneType.PRIVATE:
+            targets.append((bot, str(id), None, SceneType.PRIVATE))
+    return targets
+
 async def daily_check_mora_new_songs():
     logger.info("开始执行每日检查任务：mora 新专辑推送")
 
-    # 获取所有开启 auto_push 的群/用户
-    groups_with_push_enabled = []
-    private_with_push_enabled = []
-    mora_config = load_config()
-    for info in mora_config:
-        id: str = str(info.get('id'))
-        type: SceneType = SceneType(info.get('type'))
-        if get_push_new_albums(id, type):
-            if type == SceneType.GROUP:
-                groups_with_push_enabled.append(str(id))
-            elif type == SceneType.PRIVATE:
-                private_with_push_enabled.append(str(id))
-
     now_jp = datetime.now(pytz.timezone("Asia/Tokyo"))
     today = now_jp.date()
 
-    retryTime = 30
     albums = []
     target_date = today
-    while retryTime > 0:
-        albums = await MoraReleaseChecker.get_albums(
-            target_date = target_date,
-            region = "jpn"
-            )
-        if len(albums) > 0:
-            break
-        retryTime = retryTime - 1
-        logger.error(f"拉取失败，尝试次数剩余: {retryTime}")
-        await asyncio.sleep(20)
+    metrics.begin_push(target_date)
+    targets = []
+    results = []
+    prewarmed = False
+    job = None
     try:
-        bot = nonebot.get_bot()
-
-        # 获取当前机器人支持的群列表和好友列表
-        group_list = [str(g["group_id"]) for g in await bot.get_group_list()]
-        friend_list = [str(g["user_id"]) for g in await bot.get_friend_list()]
-
-        tasks = []
-
-        # 构建群聊推送任务
-        for group_id in group_list:
-            if group_id in groups_with_push_enabled:
-                tasks.append(
-                    send_message(albums, today, None, group_id, type=SceneType.GROUP)
-                )
+        # 先记录推送，拉取和准备期间重启也会在机器人重新连接后继续
+        job = push_jobs.create(today, "jpn")
+        _running_jobs.add(job.key)
+
+        # 优先使用预热好的结果，只需发送消息
+        with metrics.push_stage("fetch"):
+            planner = await get_prewarmed(target_date)
+            prewarmed = planner is not None
+            if prewarmed:
+                albums = planner.albums
+            else:
+                # 只轮询第一页，确认新曲发布后再完整拉取
+                albums = await release_watcher.fetch_released(target_date, "jpn")
+                if len(albums) == 0:
+                    logger.error(f"未拉取到 {target_date} 的 mora 新专辑")
+        with metrics.push_stage("targets"):
+            targets = await get_push_targets()
+
+        # 所有订阅者共用一份准备结果
+        with metrics.push_stage("prepare"):
+            if planner is None:
+                planner = PushPlanner(albums, today)
+                planner.prepare(get_auto_push_scenes())
+
+        # 记录推送进度，中途重启后只继续发送没有送达的部分
+        job.set_recipients(albums, [(bot.self_id, user_id, group_id, type) for bot, user_id, group_id, type in targets])
+        push_dispatcher.reset_stats()
+        with metrics.push_stage("send"):
+            results = await _run_push_job(job, planner)
+        logger.info(f"mora 推送完成，发送统计: {push_dispatcher.stats}")
 
-        # 构建私聊推送任务
-        for user_id in friend_list:
-            if user_id in private_with_push_enabled:
-                tasks.append(
-                    send_message(albums, today, user_id, None, type=SceneType.PRIVATE)
-                )
-
-        # 并行执行所有 send_message 任务
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # 检查结果是否有异常
-        for i, result in enumerate(results):
+    except Exception as e:
+        metrics.inc("push_failures_total", reason=type(e).__name__)
+        logger.error(f"定时推送失败: {e}")
+    finally:
+        if job is not None:
+            _running_jobs.discard(job.key)
+        metrics.end_push({
+            "专辑数": len(albums),
+            "推送目标数": len(targets),
+            "失败目标数": sum(isinstance(result, Exception) for result in results),
+            "使用预热结果": prewarmed,
+        })
+
+# 正在发送的推送，避免同一推送被重复继续
+_running_jobs: Set[str] = set()
+
+async def run_push_job(job: PushJob) -> List[Any]:
+    """
+    继续一次推送：还没有拉取完专辑和推送目标时重新拉取，之后向没有送达的目标发送
+
+    :param job: 推送记录
+    :return: 每个目标的发送结果，失败时为异常
+    """
+    if job.key in _running_jobs:
+        logger.warning(f"推送 {job.key} 正在进行，跳过")
+        return []
+    _running_jobs.add(job.key)
+    try:
+        if not job.prepared:
+            albums = await release_watcher.fetch_released(job.target_date, job.region)
+            if not albums:
+                logger.error(f"未拉取到 {job.target_date} 的 mora 新专辑")
+            targets = await get_push_targets()
+            job.set_recipients(albums, [(bot.self_id, user_id, group_id, type) for bot, user_id, group_id, type in targets])
+        return await _run_push_job(job)
+    finally:
+        _running_jobs.discard(job.key)
+
+async def _run_push_job(job: PushJob, planner: Optional[PushPlanner] = None) -> List[Any]:
+    """
+    向推送记录中还没有送达的目标发送消息，每送达一条消息记录一次进度
+
+    :param job: 已经写入推送目标的推送记录
+    :param planner: 已经准备好的推送准备器，None 时按记录中的专辑重新准备
+    :return: 每个目标的发送结果，失败时为异常
+    """
+    if planner is None:
+        planner = PushPlanner(job.albums, job.target_date, job.region)
+        planner.prepare(get_auto_push_scenes())
+
+    async def send(recipient: Dict[str, Any]):
+        job.start(recipient)
+        try:
+            # 优先使用创建推送时分配的机器人，已断开、不再能送达或记录中没有机器人时换成其他机器人
+            id = recipient["user_id"] or recipient["group_id"]
+            bot = bot_roster.resolve(id, recipient["type"], prefer=recipient.get("bot"))
+            if bot is None:
+                raise Exception("没有能送达的机器人")
+            await send_message(job.albums, job.target_date,
+                               recipient["user_id"], recipient["group_id"],
+                               type=SceneType(recipient["type"]),
+                               planner=planner,
+                               region=job.region,
+                               skip=recipient["messages"],
+                               progress=lambda count: job.progress(recipient, count),
+                               bot=bot)
+        except Exception:
+            job.mark(recipient, "failed")
+            raise
+        job.mark(recipient, "sent")
+
+    recipients = job.remaining()
+    results = await asyncio.gather(*[send(recipient) for recipient in recipients], return_exceptions=True)
+
+    # 检查结果是否有异常
+    for recipient, result in zip(recipients, results):
+        if isinstance(result, Exception):
+            logger.error(f"向 {recipient['group_id'] or recipient['user_id']} 推送失败: {result}")
+
+    # 记录已推送的专辑，供当天补充推送比对
+    if job.albums and any(not isinstance(result, Exception) for result in results):
+        batch = delivery_log.add_batch(job.target_date, job.albums)
+        for recipient, result in zip(recipients, results):
+            if not isinstance(result, Exception):
+                delivery_log.mark(job.target_date, recipient["user_id"] or recipient["group_id"], recipient["type"], batch)
+        delivery_log.save(job.target_date)
+
+    # 失败的目标保留记录，机器人重新连接后再次尝试
+    if job.remaining():
+        job.save()
+    else:
+        job.finish()
+    return results
+
+async def resume_push_jobs():
+    """继续发送重启前没有完成的推送"""
+    await bot_roster.refresh(only_missing=True)
+    for job in push_jobs.unfinished():
+        if job.key in _running_jobs:
+            continue
+        if job.prepared:
+            logger.info(f"继续推送 {job.key}，还有 {len(job.remaining())} 个目标未送达")
+        else:
+            logger.info(f"推送 {job.key} 在拉取专辑时中断，重新拉取并推送")
+        try:
+            await run_push_job(job)
+        except Exception as e:
+            logger.error(f"继续推送 {job.key} 失败: {e}")
+
+driver = nonebot.get_driver()
+
+@driver.on_bot_connect
+async def _():
+    asyncio.create_task(resume_push_jobs())
+
+async def recheck_mora_new_songs():
+    """当天补充推送：只拉取新增的专辑，向已收到当天推送的订阅者发送关注艺人的新专辑"""
+    today = datetime.now(pytz.timezone("Asia/Tokyo")).date()
+    if not delivery_log.has_push(today):
+        return
+    try:
+        albums = await MoraReleaseChecker.get_albums(target_date = today, region = "jpn", force_refresh = True)
+        new_albums = delivery_log.new_albums(today, albums)
+        latest_batch = delivery_log.latest_batch(today)
+
+        # 有新增专辑时发给所有已收到当天推送的订阅者，否则只补发上次补充推送失败、还停在旧批次的订阅者
+        targets = []
+        for bot, user_id, group_id, type in await get_push_targets():
+            delivered_batch = delivery_log.delivered_batch(today, user_id or group_id, type)
+            if delivered_batch is not None and (new_albums or delivered_batch < latest_batch):
+                targets.append((bot, user_id, group_id, type))
+        if not targets:
+            return
+        logger.info(f"{today} 新增 {len(new_albums)} 张 mora 专辑，开始向 {len(targets)} 个订阅者补充推送")
+
+        # 推送进度相同的订阅者共用同一份差异专辑
+        planners: Dict[int, PushPlanner] = {}
+
+        async def send_delta(bot, user_id, group_id, type: SceneType):
+            id = user_id or group_id
+            delivered_batch = delivery_log.delivered_batch(today, id, type)
+            if delivered_batch not in planners:
+                delivered = delivery_log.delivered(today, id, type)
+                delta = [album for album in albums if MoraReleaseChecker.album_identifier(album) not in delivered]
+                planners[delivered_batch] = PushPlanner(delta, today)
+            async for message in planners[delivered_batch].iter_watch_messages(id, type):
+                await push_dispatcher.send(bot=bot,
+                                           user_id=user_id,
+                                           group_id=group_id,
+                                           message=message)
+
+        results = await asyncio.gather(*[send_delta(*target) for target in targets], return_exceptions=True)
+        for (bot, user_id, group_id, type), result in zip(targets, results):
             if isinstance(result, Exception):
-                logger.error(f"第 {i} 个消息发送任务失败: {result}")
+                logger.error(f"向 {group_id or user_id} 补充推送失败: {result}")
+
+        # 只记录发送成功的订阅者，失败的订阅者下次检查时重新发送
+        succeeded = [target for target, result in zip(targets, results) if not isinstance(result, Exception)]
+        if succeeded:
+            batch = delivery_log.add_batch(today, new_albums) if new_albums else latest_batch
+            for bot, user_id, group_id, type in succeeded:
+                delivery_log.mark(today, user_id or group_id, type, batch)
+            delivery_log.save(today)
 
     except Exception as e:
-        logger.error(f"定时推送失败: {e}")
+        logger.error(f"补充推送失败: {e}")
 
+async def prewarm_new():
+    # 预热的是推送时（日本时间）的日期，推送在预热后几分钟进行，跨过日本时间零点时取推送时的日期
+    push_time = datetime.now(pytz.timezone("Asia/Tokyo")) + timedelta(minutes=PREWARM_AHEAD_MINUTES)
+    start_prewarm(push_time.date())
 
 async def push_new():
     asyncio.create_task(daily_check_mora_new_songs())
@@ -223,8 +517,28 @@ async def push_new():
 
 from nonebot_plugin_apscheduler import scheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+# 每日推送的时间
+PUSH_HOUR = 23
+PUSH_MINUTE = 7
+# 推送前多少分钟开始预热
+PREWARM_AHEAD_MINUTES = 6
+# 只取时分，日期任意，提前的时间跨过零点时也能得到正确的时分
+prewarm_time = datetime(2000, 1, 1, PUSH_HOUR, PUSH_MINUTE) - timedelta(minutes=PREWARM_AHEAD_MINUTES)
+scheduler.add_job(
+    prewarm_new,
+    CronTrigger(hour=prewarm_time.hour, minute=prewarm_time.minute),
+    id="prewarm_mora_new_songs"
+)
 scheduler.add_job(
     push_new,
-    CronTrigger(hour=23, minute=7),
+    CronTrigger(hour=PUSH_HOUR, minute=PUSH_MINUTE),
     id="check_mora_new_songs"
-)
\ No newline at end of file
+)
+
+if RECHECK_INTERVAL > 0:
+    scheduler.add_job(
+        recheck_mora_new_songs,
+        IntervalTrigger(minutes=RECHECK_INTERVAL),
+        id="recheck_mora_new_songs"
+    )
\ No newline at end of file
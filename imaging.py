@@ -0,0 +1,191 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+from io import BytesIO
+import math
+from pathlib import Path
+from typing import List, Optional
+
+import nonebot
+from PIL import Image, ImageDraw, ImageFont
+
+from zhenxun.configs.path_config import DATA_PATH, FONT_PATH
+from zhenxun.services.log import logger
+
+from .cache import CoverCache
+from .metrics import metrics
+
+processed_cover_path: Path = DATA_PATH / "mora/covers_processed"
+
+# 关注艺人消息中封面的最大边长，单位像素，0 为不处理直接发送原图
+COVER_MAX_SIZE = 800
+# 重新编码的格式，JPEG 或 WEBP
+COVER_FORMAT = "JPEG"
+# 重新编码的质量，1-100
+COVER_QUALITY = 85
+# 处理图片的线程数，Pillow 缩放和编码时会释放 GIL
+COVER_PROCESS_WORKERS = 2
+# 关注艺人的多张专辑封面是否拼成一张带标题的图片发送
+COVER_GRID = False
+# 专辑数不少于该值时才拼图
+COVER_GRID_MIN_ALBUMS = 2
+# 拼图中每张封面的边长，单位像素
+COVER_GRID_TILE_SIZE = 240
+# 拼图标题使用的字体，找不到时使用 Pillow 自带字体
+COVER_GRID_FONT = FONT_PATH / "HYWenHei-85W.ttf"
+# 处理后封面的内存和磁盘缓存上限，单位字节
+PROCESSED_COVER_MEMORY_LIMIT = 16 * 1024 * 1024
+PROCESSED_COVER_DISK_LIMIT = 256 * 1024 * 1024
+
+def _process(data: bytes, max_size: int, format: str, quality: int) -> bytes:
+    """在线程池中缩小并重新编码图片"""
+    with Image.open(BytesIO(data)) as img:
+        # JPEG 解码时直接按比例缩小，减少解码的像素数
+        img.draft("RGB", (max_size, max_size))
+        if max(img.size) > max_size:
+            img.thumbnail((max_size, max_size), Image.LANCZOS)
+        if format == "JPEG" and img.mode != "RGB":
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        output = BytesIO()
+        img.save(output, format, quality=quality)
+        return output.getvalue()
+
+def _fit_text(draw: ImageDraw.ImageDraw, text: str, font, width: int) -> str:
+    """截断文本使其不超过指定宽度"""
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "…", font=font) > width:
+        text = text[:-1]
+    return text + "…"
+
+def _render_grid(covers: List[bytes], captions: List[str], tile: int, font_path: str, format: str, quality: int) -> bytes:
+    """在线程池中把多张封面拼成一张带标题的图片"""
+    padding = tile // 24
+    caption_height = tile // 8
+    columns = math.ceil(math.sqrt(len(covers)))
+    rows = math.ceil(len(covers) / columns)
+    try:
+        font = ImageFont.truetype(font_path, caption_height * 3 // 4)
+    except OSError:
+        font = ImageFont.load_default()
+    canvas = Image.new(
+        "RGB",
+        (columns * (tile + padding) + padding, rows * (tile + caption_height + padding) + padding),
+        "white"
+    )
+    draw = ImageDraw.Draw(canvas)
+    for idx, (data, caption) in enumerate(zip(covers, captions)):
+        x = padding + idx % columns * (tile + padding)
+        y = padding + idx // columns * (tile + caption_height + padding)
+        try:
+            with Image.open(BytesIO(data)) as img:
+                img.draft("RGB", (tile, tile))
+                img.thumbnail((tile, tile), Image.LANCZOS)
+                img = img.convert("RGB")
+                canvas.paste(img, (x + (tile - img.width) // 2, y + (tile - img.height) // 2))
+        except Exception:
+            # 封面无法解析时留出灰色占位
+            draw.rectangle((x, y, x + tile - 1, y + tile - 1), fill="lightgray")
+        draw.text((x, y + tile + padding // 2), _fit_text(draw, caption, font, tile), fill="black", font=font)
+    output = BytesIO()
+    canvas.save(output, format, quality=quality)
+    return output.getvalue()
+
+class CoverProcessor:
+    """
+    封面缩小和重新压缩
+
+    在线程池中处理，不阻塞事件循环；结果按 (原图哈希, 参数) 缓存，
+    处理失败或处理后反而更大时使用原图。
+    """
+
+    def __init__(
+        self,
+        max_size: int = COVER_MAX_SIZE,
+        format: str = COVER_FORMAT,
+        quality: int = COVER_QUALITY,
+        workers: int = COVER_PROCESS_WORKERS,
+        path: Path = processed_cover_path
+    ):
+        self.max_size = max_size
+        self.format = format.upper()
+        self.quality = quality
+        self.workers = workers
+        self.cache = CoverCache(path, PROCESSED_COVER_MEMORY_LIMIT, PROCESSED_COVER_DISK_LIMIT, name="processed")
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def executor(self) -> ThreadPoolExecutor:
+        # 不使用进程池：在多线程的事件循环进程中 fork 子进程可能死锁
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="mora_cover")
+        return self._executor
+
+    def _key(self, data: bytes) -> str:
+        return f"{hashlib.sha1(data).hexdigest()}-{self.max_size}-{self.format}-{self.quality}"
+
+    async def process(self, data: bytes) -> bytes:
+        """
+        缩小并重新压缩封面
+
+        :param data: 原图数据
+        :return: 处理后的图片数据
+        """
+        if self.max_size <= 0:
+            return data
+        key = self._key(data)
+        processed = await self.cache.get(key)
+        if processed is not None:
+            return processed
+        try:
+            with metrics.timer("process_cover"):
+                processed = await asyncio.get_running_loop().run_in_executor(
+                    self.executor(), _process, data, self.max_size, self.format, self.quality
+                )
+        except Exception as e:
+            metrics.inc("cover_process_failures_total", reason=type(e).__name__)
+            logger.warning(f"处理封面失败，使用原图: {e}")
+            return data
+        if len(processed) >= len(data):
+            processed = data
+        metrics.inc("cover_bytes_saved_total", len(data) - len(processed))
+        await self.cache.put(key, processed)
+        return processed
+
+    async def grid(self, covers: List[bytes], captions: List[str]) -> bytes:
+        """
+        把同一艺人的多张封面拼成一张带标题的图片，相同的封面和标题只渲染一次
+
+        :param covers: 封面数据
+        :param captions: 每张封面下方的标题
+        :return: 拼好的图片数据，渲染失败时抛出异常
+        """
+        digest = hashlib.sha1()
+        for data, caption in zip(covers, captions):
+            digest.update(hashlib.sha1(data).digest())
+            digest.update(caption.encode("utf8") + b"\0")
+        key = f"grid-{digest.hexdigest()}-{COVER_GRID_TILE_SIZE}-{self.format}-{self.quality}"
+        image = await self.cache.get(key)
+        if image is not None:
+            return image
+        with metrics.timer("render_cover_grid"):
+            image = await asyncio.get_running_loop().run_in_executor(
+                self.executor(), _render_grid, covers, captions,
+                COVER_GRID_TILE_SIZE, str(COVER_GRID_FONT), self.format, self.quality
+            )
+        await self.cache.put(key, image)
+        return image
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+cover_processor = CoverProcessor()
+
+driver = nonebot.get_driver()
+
+@driver.on_shutdown
+async def _():
+    cover_processor.shutdown()
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from zhenxun.configs.path_config import DATA_PATH
+from zhenxun.services.log import logger
+
+from .album import to_albums
+
+job_path: Path = DATA_PATH / "mora/jobs"
+
+# 推送进度变化后延迟写入的时间，单位秒
+JOB_SAVE_DELAY = 1
+# 未完成的推送在创建后多少小时内重启仍会继续，超过则放弃
+JOB_RESUME_HOURS = 12
+# 每个目标最多尝试推送的次数（包括重启后继续的推送）
+JOB_MAX_ATTEMPTS = 3
+
+class PushJob:
+    """
+    一次每日推送的进度记录，保存在 DATA_PATH/mora/jobs/地区_日期 下
+
+    推送开始时先创建只有日期的记录（phase 为 fetch），拉取完专辑和推送目标后
+    把专辑列表写入 albums.json，之后只改写记录每个目标状态的 state.json：
+    state 为 pending/sent/failed，messages 为已经送达的消息条数，
+    重启后只继续发送没有送达的目标，并跳过已经送达的消息；
+    还在 fetch 阶段的记录在重启后重新拉取和准备。
+    """
+
+    def __init__(self, path: Path, target_date: datetime.date, region: str, albums: List[Dict[str, Any]], state: Dict[str, Any]):
+        self.path = path
+        self.target_date = target_date
+        self.region = region
+        self.albums = albums
+        self.state = state
+        self._save_task: Optional[asyncio.Task] = None
+
+    @property
+    def key(self) -> str:
+        return self.path.name
+
+    @property
+    def recipients(self) -> List[Dict[str, Any]]:
+        return self.state["recipients"]
+
+    @property
+    def prepared(self) -> bool:
+        """是否已经拉取完专辑和推送目标"""
+        return self.state.get("phase", "send") == "send"
+
+    def set_recipients(self, albums: List[Dict[str, Any]], targets: List[Tuple[str, Optional[str], Optional[str], int]]):
+        """
+        写入拉取到的专辑和推送目标，之后开始发送
+
+        :param albums: 推送的专辑列表
+        :param targets: (机器人ID, user_id, group_id, 类型) 列表
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path / "albums.tmp"
+        with open(tmp_file, "w", encoding="utf8") as f:
+            json.dump(albums, f, ensure_ascii=False, default=dict)
+        tmp_file.replace(self.path / "albums.json")
+        self.albums = albums
+        self.state["recipients"] = [
+            {"bot": bot_id, "user_id": user_id, "group_id": group_id, "type": int(type), "state": "pending", "messages": 0, "attempts": 0}
+            for bot_id, user_id, group_id, type in targets
+        ]
+        self.state["phase"] = "send"
+        self.save()
+
+    def remaining(self) -> List[Dict[str, Any]]:
+        """还没有送达且未超过尝试次数的目标"""
+        return [
+            recipient for recipient in self.recipients
+            if recipient["state"] != "sent" and recipient["attempts"] < JOB_MAX_ATTEMPTS
+        ]
+
+    def start(self, recipient: Dict[str, Any]):
+        """开始向目标推送"""
+        recipient["state"] = "pending"
+        recipient["attempts"] += 1
+        self.schedule_save()
+
+    def progress(self, recipient: Dict[str, Any], messages: int):
+        """记录目标已经送达的消息条数"""
+        recipient["messages"] = messages
+        self.schedule_save()
+
+    def mark(self, recipient: Dict[str, Any], state: str):
+        """记录目标的推送结果"""
+        recipient["state"] = state
+        self.schedule_save()
+
+    def save(self):
+        """立即写入推送进度"""
+        if self._save_task is not None:
+            self._save_task.cancel()
+            self._save_task = None
+        self.path.mkdir(parents=True, exist_ok=True)
+        file = self.path / "state.json"
+        tmp_file = file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        tmp_file.replace(file)
+
+    def schedule_save(self):
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.get_running_loop().create_task(self._delayed_save())
+
+    async def _delayed_save(self):
+        await asyncio.sleep(JOB_SAVE_DELAY)
+        self._save_task = None
+        try:
+            self.save()
+        except Exception as e:
+            logger.warning(f"写入推送进度 {self.key} 失败: {e}")
+
+    def finish(self):
+        """推送全部结束后删除记录"""
+        if self._save_task is not None:
+            self._save_task.cancel()
+            self._save_task = None
+        shutil.rmtree(self.path, ignore_errors=True)
+
+class PushJobStore:
+    """每日推送进度记录的读写"""
+
+    def __init__(self, path: Path = job_path):
+        self.path = path
+
+    def create(self, target_date: datetime.date, region: str) -> PushJob:
+        """
+        推送开始时新建还没有专辑和推送目标的记录并立即写入
+
+        :param target_date: 推送的日期
+        :param region: 地区代码
+        """
+        path = self.path / f"{region}_{target_date.strftime('%Y%m%d')}"
+        shutil.rmtree(path, ignore_errors=True)
+        state = {
+            "date": target_date.strftime("%Y%m%d"),
+            "region": region,
+            "created_at": time.time(),
+            "phase": "fetch",
+            "recipients": [],
+        }
+        job = PushJob(path, target_date, region, [], state)
+        job.save()
+        return job
+
+    def _load(self, path: Path) -> Optional[PushJob]:
+        try:
+            with open(path / "state.json", "r", encoding="utf8") as f:
+                state = json.load(f)
+            albums = []
+            if state.get("phase", "send") == "send":
+                with open(path / "albums.json", "r", encoding="utf8") as f:
+                    albums = to_albums(json.load(f))
+        except Exception as e:
+            logger.warning(f"读取推送进度 {path.name} 失败: {e}")
+            return None
+        target_date = datetime.strptime(state["date"], "%Y%m%d").date()
+        return PushJob(path, target_date, state["region"], albums, state)
+
+    def unfinished(self) -> List[PushJob]:
+        """
+        读取所有未完成的推送，过期或无法读取的记录会被删除
+
+        :return: 按创建时间排列的推送记录
+        """
+        if not self.path.exists():
+            return []
+        jobs = []
+        for path in sorted(self.path.iterdir()):
+            if not path.is_dir():
+                continue
+            job = self._load(path)
+            if job is None:
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            if time.time() - job.state["created_at"] > JOB_RESUME_HOURS * 3600:
+                logger.warning(f"推送 {job.key} 已超过 {JOB_RESUME_HOURS} 小时，不再继续，还有 {len(job.remaining())} 个目标未送达")
+                job.finish()
+                continue
+            if job.prepared and not job.remaining():
+                job.finish()
+                continue
+            jobs.append(job)
+        return sorted(jobs, key=lambda job: job.state["created_at"])
+
+push_jobs = PushJobStore()
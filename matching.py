@@ -0,0 +1,180 @@
+from collections import deque
+import re
+from typing import Any, Dict, FrozenSet, Iterable, List, Set
+
+# 艺人名分隔符：& , 、 /
+ARTIST_SEPARATOR_REGEX = re.compile(r'[&,、/]')
+
+def is_pure_alpha(name: str) -> bool:
+    """判断是否为纯字母"""
+    return all(c.isalpha() and c.isascii() for c in name)
+
+def contain_threshold(name: str) -> int:
+    """名字长度达到该阈值时允许子串包含匹配"""
+    return 6 if is_pure_alpha(name) else 4
+
+def split_artist_name(artist_name: str) -> List[str]:
+    """按分隔符切分艺人名"""
+    parts = ARTIST_SEPARATOR_REGEX.split(artist_name)
+    return [part.strip() for part in parts if part.strip()]
+
+class AhoCorasick:
+    """多模式子串匹配自动机，一次扫描找出文本中出现的全部模式串"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        if pattern not in self._output[state]:
+            self._output[state].append(pattern)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail_state = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail_state if fail_state != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def search(self, text: str) -> Set[str]:
+        """返回文本中出现过的全部模式串"""
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._output[state]:
+                found.update(self._output[state])
+        return found
+
+class ArtistMatcher:
+    """
+    针对一批专辑预先建立的艺人匹配索引，结果与 MoraHelper.is_same_artist 一致
+
+    完全相等和分隔符切分后的精确匹配走哈希索引，
+    长名字的子串包含匹配用 AhoCorasick 一次扫描全部专辑艺人名，结果按名字缓存。
+    """
+
+    def __init__(self, albums: List[Dict[str, Any]]):
+        self.albums = albums
+        self._artist_names = [album["artistName"].strip() for album in albums]
+        self._exact_index: Dict[str, List[int]] = {}
+        self._part_index: Dict[str, List[int]] = {}
+        for idx, artist_name in enumerate(self._artist_names):
+            self._exact_index.setdefault(artist_name, []).append(idx)
+            for part in dict.fromkeys(split_artist_name(artist_name)):
+                self._part_index.setdefault(part, []).append(idx)
+        self._cache: Dict[str, List[int]] = {}
+
+    def _prepare(self, names: Iterable[str]):
+        """批量计算未缓存的名字，长名字共用一次自动机扫描"""
+        long_names = []
+        for name in dict.fromkeys(name.strip() for name in names):
+            if name in self._cache:
+                continue
+            if len(name) >= contain_threshold(name):
+                long_names.append(name)
+            else:
+                matched = set(self._exact_index.get(name, [])) | set(self._part_index.get(name, []))
+                self._cache[name] = sorted(matched)
+
+        if not long_names:
+            return
+        contained: Dict[str, List[int]] = {name: [] for name in long_names}
+        automaton = AhoCorasick(long_names)
+        for idx, artist_name in enumerate(self._artist_names):
+            for name in automaton.search(artist_name):
+                contained[name].append(idx)
+        self._cache.update(contained)
+
+    def match(self, name: str) -> List[Dict[str, Any]]:
+        """
+        获取与关注艺人名匹配的专辑
+
+        :param name: 关注的艺人名
+        :return: 按原顺序排列的专辑列表
+        """
+        name = name.strip()
+        if name not in self._cache:
+            self._prepare([name])
+        return [self.albums[idx] for idx in self._cache[name]]
+
+    def match_many(self, names: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        批量获取与多个关注艺人名匹配的专辑
+
+        :param names: 关注的艺人名
+        :return: 艺人名 -> 专辑列表
+        """
+        names = list(names)
+        self._prepare(names)
+        return {name: self.match(name) for name in names}
+
+class BlacklistFilter:
+    """
+    编译后的黑名单过滤器，艺人名包含任意黑名单名称的专辑会被过滤
+
+    全部黑名单名称共用一个 AhoCorasick 自动机，每个艺人名只扫描一次。
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.names = frozenset(names)
+        # 空名称包含于任何艺人名中
+        self._block_all = "" in self.names
+        self._automaton = AhoCorasick(name for name in self.names if name)
+
+    def is_blocked(self, artist_name: str) -> bool:
+        """判断艺人名是否包含任意黑名单名称"""
+        return self._block_all or bool(self._automaton.search(artist_name))
+
+    def filter(self, albums: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """过滤掉黑名单艺人的专辑"""
+        if not self.names:
+            return list(albums)
+        return [album for album in albums if not self.is_blocked(album["artistName"])]
+
+    @staticmethod
+    def partition(albums: List[Dict[str, Any]], filters: Dict[Any, "BlacklistFilter"]) -> Dict[Any, List[Dict[str, Any]]]:
+        """
+        一次扫描为多个黑名单同时过滤同一批专辑
+
+        :param albums: 专辑列表
+        :param filters: 任意键 -> 黑名单过滤器
+        :return: 键 -> 过滤后的专辑列表
+        """
+        # 黑名单相同的只计算一次
+        groups: Dict[FrozenSet[str], List[Any]] = {}
+        for key, blacklist_filter in filters.items():
+            groups.setdefault(blacklist_filter.names, []).append(key)
+
+        union = BlacklistFilter(name for names in groups for name in names)
+        results: Dict[FrozenSet[str], List[Dict[str, Any]]] = {names: [] for names in groups}
+        for album in albums:
+            found = union._automaton.search(album["artistName"])
+            for names, result in results.items():
+                if "" in names or not found.isdisjoint(names):
+                    continue
+                result.append(album)
+
+        return {key: results[names] for names, keys in groups.items() for key in keys}
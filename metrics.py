@@ -0,0 +1,165 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from zhenxun.configs.path_config import DATA_PATH
+from zhenxun.services.log import logger
+
+metrics_path: Path = DATA_PATH / "mora/metrics.prom"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class Metrics:
+    """
+    插件内的计数器和耗时统计
+
+    计数器和耗时按名称累计，可导出为 Prometheus 文本格式；
+    每日推送期间额外记录各阶段耗时和计数器增量，供 mora状态 查看。
+    """
+
+    def __init__(self):
+        self.counters: Dict[Tuple[str, LabelKey], float] = defaultdict(float)
+        # 名称 -> [次数, 总耗时, 最大耗时]
+        self.timers: Dict[str, list] = defaultdict(lambda: [0, 0.0, 0.0])
+        self.last_push: Dict[str, Any] = {}
+        self._push: Optional[Dict[str, Any]] = None
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        """
+        增加计数器
+
+        :param name: 计数器名称
+        :param value: 增加的值
+        :param labels: 标签
+        """
+        self.counters[(name, tuple(sorted((k, str(v)) for k, v in labels.items())))] += value
+
+    def observe(self, name: str, seconds: float):
+        """记录一次耗时"""
+        timer = self.timers[name]
+        timer[0] += 1
+        timer[1] += seconds
+        timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        """统计代码块耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def begin_push(self, target_date):
+        """开始记录一次推送"""
+        self._push = {
+            "date": str(target_date),
+            "started_at": time.time(),
+            "stages": {},
+            "counters": dict(self.counters),
+            "timers": {name: list(timer) for name, timer in self.timers.items()},
+        }
+
+    @contextmanager
+    def push_stage(self, name: str):
+        """统计推送中一个阶段的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(f"push_{name}", seconds)
+            if self._push is not None:
+                self._push["stages"][name] = self._push["stages"].get(name, 0.0) + seconds
+
+    def end_push(self, summary: Optional[Dict[str, Any]] = None):
+        """
+        结束本次推送记录，计算计数器和耗时的增量并导出
+
+        :param summary: 附加显示的推送概要
+        """
+        if self._push is None:
+            return
+        push = self._push
+        self._push = None
+        counters = {}
+        for key, value in self.counters.items():
+            delta = value - push["counters"].get(key, 0)
+            if delta:
+                counters[key] = delta
+        timers = {}
+        for name, (count, total, _) in self.timers.items():
+            old_count, old_total, _ = push["timers"].get(name, [0, 0.0, 0.0])
+            if count > old_count:
+                timers[name] = (count - old_count, total - old_total)
+        self.last_push = {
+            "date": push["date"],
+            "started_at": push["started_at"],
+            "duration": time.time() - push["started_at"],
+            "stages": push["stages"],
+            "counters": counters,
+            "timers": timers,
+            "summary": summary or {},
+        }
+        self.export()
+
+    @staticmethod
+    def _labels(labels: LabelKey) -> str:
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+    def render_prometheus(self) -> str:
+        """导出为 Prometheus 文本格式"""
+        lines = []
+        for name in sorted({name for name, _ in self.counters}):
+            lines.append(f"# TYPE mora_{name} counter")
+            for (counter_name, labels), value in sorted(self.counters.items()):
+                if counter_name == name:
+                    lines.append(f"mora_{name}{self._labels(labels)} {value}")
+        if self.timers:
+            lines.append("# TYPE mora_stage_seconds summary")
+            for name, (count, total, _) in sorted(self.timers.items()):
+                lines.append(f'mora_stage_seconds_count{{stage="{name}"}} {count}')
+                lines.append(f'mora_stage_seconds_sum{{stage="{name}"}} {total}')
+            lines.append("# TYPE mora_stage_seconds_max gauge")
+            for name, (_, _, maximum) in sorted(self.timers.items()):
+                lines.append(f'mora_stage_seconds_max{{stage="{name}"}} {maximum}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: Path = metrics_path):
+        """写入 Prometheus 文本文件，可供 node_exporter 的 textfile collector 读取"""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(self.render_prometheus(), encoding="utf8")
+            tmp_path.replace(path)
+        except Exception as e:
+            logger.warning(f"导出 mora 统计失败: {e}")
+
+    def format_last_push(self) -> str:
+        """上一次推送的各阶段耗时和计数"""
+        push = self.last_push
+        if not push:
+            return "还没有进行过推送"
+        lines = [
+            f"上次推送：{push['date']}，开始于 {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(push['started_at']))}，共 {push['duration']:.1f} 秒",
+            "阶段耗时：",
+        ]
+        for name, seconds in push["stages"].items():
+            lines.append(f"  {name}: {seconds:.2f} 秒")
+        if push["timers"]:
+            lines.append("操作耗时（次数 / 累计）：")
+            for name, (count, total) in sorted(push["timers"].items()):
+                lines.append(f"  {name}: {count} 次 / {total:.2f} 秒")
+        if push["counters"]:
+            lines.append("计数：")
+            for (name, labels), value in sorted(push["counters"].items()):
+                lines.append(f"  {name}{self._labels(labels)}: {value:g}")
+        for key, value in push["summary"].items():
+            lines.append(f"{key}: {value}")
+        return "\n".join(lines)
+
+metrics = Metrics()
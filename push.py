@@ -0,0 +1,263 @@
+import asyncio
+from io import BytesIO
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from nonebot_plugin_uninfo import SceneType
+
+from zhenxun.services.log import logger
+from zhenxun.utils.message import MessageUtils
+
+from .matching import ArtistMatcher, BlacklistFilter
+from .utility import *
+from .watcher import release_watcher
+
+# 预热时最多预先渲染的黑名单组合数，按订阅者数量从多到少选取
+PREWARM_MAX_VARIANTS = 20
+
+class PushPlanner:
+    """
+    推送消息准备器，同一批专辑只计算一次
+
+    黑名单相同的订阅者共用过滤结果和总表图片；所有订阅者关注的艺人名合在一起只匹配一次，
+    再按反向索引分发给关注者，黑名单和命中的艺人都相同时共用关注艺人消息，每张封面只下载一次。
+    """
+
+    def __init__(self, albums: List[Dict[str, Any]], target_date: datetime.date, region: str = "jpn", single_scene: bool = False):
+        self.albums = albums
+        self.target_date = target_date
+        self.region = region
+        # 只为一个场景发送时（如查询命令）只匹配该场景的关注艺人，不为所有场景建立反向索引
+        self.single_scene = single_scene
+        self._filtered: Dict[FrozenSet[str], List[Dict[str, Any]]] = {}
+        self._allowed: Dict[FrozenSet[str], Set[int]] = {}
+        self._artist_matcher: Optional[ArtistMatcher] = None
+        # 建立时已匹配过的关注艺人名、其中有新专辑的艺人名，以及 (ID, 类型) -> 有新专辑的关注艺人名
+        self._indexed_names: Set[str] = set()
+        self._hit_names: Set[str] = set()
+        self._scene_hits: Optional[Dict[Tuple[str, int], Set[str]]] = None
+        self._table_images: Dict[FrozenSet[str], asyncio.Task] = {}
+        self._watch_results: Dict[Tuple[FrozenSet[str], Tuple[str, ...]], asyncio.Task] = {}
+        self._covers: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def blacklist_key(blacklist_artists: List[Dict[str, Any]]) -> FrozenSet[str]:
+        return frozenset(artist["name"] for artist in blacklist_artists)
+
+    def filtered_albums(self, blacklist_artists: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """按黑名单过滤专辑，相同黑名单只过滤一次"""
+        key = self.blacklist_key(blacklist_artists)
+        if key not in self._filtered:
+            self._filtered[key] = BlacklistFilter(key).filter(self.albums)
+        return self._filtered[key]
+
+    def prepare(self, scenes: List[Tuple[str, SceneType]]):
+        """
+        一次扫描为所有订阅者的黑名单过滤专辑
+
+        :param scenes: (用户/群组ID, 类型) 列表
+        """
+        filters = {
+            blacklist_filter.names: blacklist_filter
+            for blacklist_filter in (get_blacklist_filter(id, type) for id, type in scenes)
+            if blacklist_filter.names not in self._filtered
+        }
+        self._filtered.update(BlacklistFilter.partition(self.albums, filters))
+
+    @property
+    def artist_matcher(self) -> ArtistMatcher:
+        """全部专辑的艺人匹配索引"""
+        if self._artist_matcher is None:
+            self._artist_matcher = ArtistMatcher(self.albums)
+        return self._artist_matcher
+
+    def scene_hits(self) -> Dict[Tuple[str, int], Set[str]]:
+        """
+        所有场景关注的艺人名合在一起匹配一次全部专辑，再按反向索引把命中的艺人分发给关注者
+
+        :return: (用户/群组ID, 类型) -> 有新专辑的关注艺人名
+        """
+        if self._scene_hits is None:
+            followers = get_followed_artists()
+            self._indexed_names = set(followers)
+            self._scene_hits = {}
+            for name, albums in self.artist_matcher.match_many(followers).items():
+                if albums:
+                    self._hit_names.add(name)
+                    for key in followers[name]:
+                        self._scene_hits.setdefault(key, set()).add(name)
+        return self._scene_hits
+
+    def hit_artists(self, id: str, type: SceneType) -> List[Dict[str, Any]]:
+        """场景关注列表中有新专辑的艺人，保持关注列表的顺序"""
+        watch_artists = get_watch_artists(id, type)
+        if self.single_scene:
+            matched = self.artist_matcher.match_many(artist["name"].strip() for artist in watch_artists)
+            return [artist for artist in watch_artists if matched[artist["name"].strip()]]
+        self.scene_hits()
+        hit_artists = []
+        for artist in watch_artists:
+            name = artist["name"].strip()
+            if name in self._hit_names:
+                hit_artists.append(artist)
+            elif name not in self._indexed_names and self.artist_matcher.match(name):
+                # 建立索引之后新关注的艺人单独匹配
+                hit_artists.append(artist)
+        return hit_artists
+
+    def _allowed_ids(self, blacklist_artists: List[Dict[str, Any]]) -> Set[int]:
+        key = self.blacklist_key(blacklist_artists)
+        if key not in self._allowed:
+            self._allowed[key] = {id(album) for album in self.filtered_albums(blacklist_artists)}
+        return self._allowed[key]
+
+    async def download_cover(self, url: str) -> BytesIO:
+        """下载封面，同一地址只下载一次，失败后下次调用重新下载"""
+        task = self._covers.get(url)
+        if task is None:
+            task = asyncio.create_task(self._download_cover(url))
+            self._covers[url] = task
+        try:
+            data = await task
+        except Exception:
+            # 只缓存下载成功的结果，避免一次失败影响之后所有订阅者
+            if self._covers.get(url) is task:
+                del self._covers[url]
+            raise
+        # 每次返回新的 BytesIO，避免多个消息共用读取位置
+        return BytesIO(data)
+
+    @staticmethod
+    async def _download_cover(url: str) -> bytes:
+        return (await download_cover(url)).getvalue()
+
+    def table_image(self, blacklist_artists: List[Dict[str, Any]]) -> asyncio.Task:
+        """渲染过滤后的总表图片，相同黑名单只渲染一次"""
+        key = self.blacklist_key(blacklist_artists)
+        if key not in self._table_images:
+            self._table_images[key] = asyncio.create_task(
+                MoraHelper.get_all_albums_image(self.filtered_albums(blacklist_artists), self.target_date, self.region)
+            )
+        return self._table_images[key]
+
+    def watch_results(self, blacklist_artists: List[Dict[str, Any]], watch_artists: List[Dict[str, Any]]) -> asyncio.Task:
+        """生成关注艺人的消息，黑名单和关注艺人都相同时只生成一次"""
+        key = (self.blacklist_key(blacklist_artists), tuple(artist["name"] for artist in watch_artists))
+        if key not in self._watch_results:
+            # 复用全部专辑的匹配结果，只去掉被黑名单过滤的专辑
+            allowed = self._allowed_ids(blacklist_artists)
+            matched = {
+                artist["name"]: [album for album in self.artist_matcher.match(artist["name"]) if id(album) in allowed]
+                for artist in watch_artists
+            }
+            self._watch_results[key] = asyncio.create_task(
+                MoraHelper.get_watch_artists_albums(
+                    self.filtered_albums(blacklist_artists),
+                    watch_artists,
+                    download=self.download_cover,
+                    matched=matched
+                )
+            )
+        return self._watch_results[key]
+
+    async def warm(self, scenes: List[Tuple[str, SceneType]]):
+        """
+        预先完成所有订阅者需要的计算：过滤黑名单、匹配关注艺人、下载封面、渲染常见黑名单组合的总表
+
+        :param scenes: (用户/群组ID, 类型) 列表
+        """
+        self.prepare(scenes)
+        scene_hits = self.scene_hits()
+        variants: Dict[FrozenSet[str], Tuple[int, List[Dict[str, Any]]]] = {}
+        tasks = []
+        for id, type in scenes:
+            blacklist_artists = get_blacklist_artists(id, type)
+            key = self.blacklist_key(blacklist_artists)
+            count, _ = variants.get(key, (0, blacklist_artists))
+            variants[key] = (count + 1, blacklist_artists)
+            # 只为关注的艺人有新专辑的订阅者准备关注消息
+            if (str(id), int(type)) in scene_hits:
+                tasks.append(self.watch_results(blacklist_artists, self.hit_artists(id, type)))
+
+        common_variants = sorted(variants.values(), key=lambda variant: variant[0], reverse=True)[:PREWARM_MAX_VARIANTS]
+        tasks.extend(self.table_image(blacklist_artists) for _, blacklist_artists in common_variants)
+
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.warning(f"mora 推送预热失败: {result}")
+
+    async def iter_messages(self, id: str, type: SceneType):
+        """
+        按发送顺序逐条生成发送给指定场景的消息
+
+        :param id: 用户/群组ID
+        :param type: 场景类型
+        """
+        yield MessageUtils.build_message(
+            "=== {date} 发布了 {len} 张专辑 ===\n".strip().format(date=get_date_str(self.target_date), len=len(self.albums))
+        )
+        async for message in self.iter_watch_messages(id, type):
+            yield message
+        all_albums_image: list = await self.table_image(get_blacklist_artists(id, type))
+        yield MessageUtils.build_message([
+            BytesIO(item.getvalue()) if isinstance(item, BytesIO) else item for item in all_albums_image
+        ])
+
+    async def iter_watch_messages(self, id: str, type: SceneType):
+        """
+        逐条生成发送给指定场景的关注艺人消息
+
+        :param id: 用户/群组ID
+        :param type: 场景类型
+        """
+        hit_artists = self.hit_artists(id, type)
+        if not hit_artists:
+            return
+        blacklist_artists = get_blacklist_artists(id, type)
+        for result_info in await self.watch_results(blacklist_artists, hit_artists):
+            # 多个订阅者共用结果时复制图片数据，避免共用同一个 BytesIO
+            yield MessageUtils.build_message([
+                BytesIO(item.getvalue()) if isinstance(item, BytesIO) else item for item in result_info
+            ])
+
+# 按日期保存的预热任务
+_prewarm_tasks: Dict[datetime.date, asyncio.Task] = {}
+
+async def _prewarm(target_date: datetime.date) -> Optional[PushPlanner]:
+    albums = await release_watcher.fetch_released(target_date, "jpn")
+    if not albums:
+        logger.error(f"预热时未拉取到 {target_date} 的 mora 新专辑")
+        return None
+    planner = PushPlanner(albums, target_date)
+    await planner.warm(get_auto_push_scenes())
+    logger.info(f"{target_date} 的 mora 推送预热完成，共 {len(albums)} 张专辑")
+    return planner
+
+def start_prewarm(target_date: datetime.date) -> asyncio.Task:
+    """
+    开始预热指定日期的推送，同一日期只预热一次
+
+    :param target_date: 推送的日期
+    """
+    for old_date in [date for date in _prewarm_tasks if date < target_date]:
+        del _prewarm_tasks[old_date]
+    task = _prewarm_tasks.get(target_date)
+    if task is None:
+        task = asyncio.create_task(_prewarm(target_date))
+        _prewarm_tasks[target_date] = task
+    return task
+
+async def get_prewarmed(target_date: datetime.date) -> Optional[PushPlanner]:
+    """
+    获取预热好的推送准备器，预热仍在进行时等待其完成
+
+    :param target_date: 推送的日期
+    :return: 没有预热或预热失败时返回 None
+    """
+    task = _prewarm_tasks.get(target_date)
+    if task is None:
+        return None
+    try:
+        return await asyncio.shield(task)
+    except Exception as e:
+        logger.error(f"mora 推送预热失败: {e}")
+        return None
@@ -0,0 +1,105 @@
+import asyncio
+from collections import OrderedDict
+import hashlib
+import json
+from io import BytesIO
+from typing import List, Tuple
+
+from zhenxun.services.log import logger
+from zhenxun.utils._image_template import ImageTemplate
+
+from .metrics import metrics
+
+# 单张总表图片的目标大小，单位字节，超过时拆分成更多页
+TABLE_IMAGE_TARGET_BYTES = 4 * 1024 * 1024
+# 每页行数的上下限
+TABLE_PAGE_MAX_ROWS = 500
+TABLE_PAGE_MIN_ROWS = 50
+# 同时渲染的页数
+TABLE_RENDER_CONCURRENCY = 2
+# 内存中缓存的总表数量
+TABLE_CACHE_SIZE = 16
+
+class TableRenderer:
+    """
+    总表图片渲染器
+
+    按 (日期, 地区, 行内容哈希) 缓存渲染结果，多页并发渲染，
+    每页行数根据之前渲染得到的每行字节数估算，使单张图片接近目标大小。
+    """
+
+    def __init__(self):
+        self._cache: "OrderedDict[Tuple[str, str, str], List[bytes]]" = OrderedDict()
+        self._inflight: dict = {}
+        self._semaphore = asyncio.Semaphore(TABLE_RENDER_CONCURRENCY)
+        # 每行图片字节数的估计值，渲染后更新
+        self._bytes_per_row = TABLE_IMAGE_TARGET_BYTES / TABLE_PAGE_MAX_ROWS
+
+    @staticmethod
+    def rows_hash(rows: List[List[str]]) -> str:
+        return hashlib.sha1(json.dumps(rows, ensure_ascii=False).encode("utf8")).hexdigest()
+
+    def page_size(self) -> int:
+        """根据每行字节数估算每页行数"""
+        rows = int(TABLE_IMAGE_TARGET_BYTES / max(self._bytes_per_row, 1))
+        return max(TABLE_PAGE_MIN_ROWS, min(TABLE_PAGE_MAX_ROWS, rows))
+
+    async def _render_page(self, rows: List[List[str]], page_name: str) -> List[bytes]:
+        async with self._semaphore:
+            with metrics.timer("render_table_page"):
+                img = await ImageTemplate.table_page(
+                    f"所有新曲 第 {page_name} 页 共 {len(rows)} 首",
+                    None,
+                    ['专辑名', '艺人', '简介'],
+                    rows,
+                    10,
+                    10
+                )
+                data = img.pic2bytes()
+        # 平滑更新每行字节数的估计值
+        self._bytes_per_row = self._bytes_per_row * 0.5 + len(data) / max(len(rows), 1) * 0.5
+        if len(data) > TABLE_IMAGE_TARGET_BYTES and len(rows) > TABLE_PAGE_MIN_ROWS:
+            # 图片过大时对半拆分重新渲染
+            middle = len(rows) // 2
+            logger.info(f"总表图片 {len(data)} 字节超过目标大小，拆分为 {middle} + {len(rows) - middle} 行")
+            first, second = await asyncio.gather(
+                self._render_page(rows[:middle], f"{page_name}-1"),
+                self._render_page(rows[middle:], f"{page_name}-2")
+            )
+            return first + second
+        return [data]
+
+    async def _render(self, rows: List[List[str]]) -> List[bytes]:
+        page_size = self.page_size()
+        chunks = [rows[i:i + page_size] for i in range(0, len(rows), page_size)]
+        pages = await asyncio.gather(*[self._render_page(chunk, str(idx)) for idx, chunk in enumerate(chunks, 1)])
+        return [page for chunk_pages in pages for page in chunk_pages]
+
+    async def render(self, rows: List[List[str]], date_str: str, region: str) -> List[BytesIO]:
+        """
+        渲染总表图片，相同内容直接返回缓存
+
+        :param rows: 表格行
+        :param date_str: 日期
+        :param region: 地区代码
+        :return: 每页一张图片
+        """
+        key = (date_str, region, self.rows_hash(rows))
+        pages = self._cache.get(key)
+        if pages is not None:
+            self._cache.move_to_end(key)
+            metrics.inc("table_cache_total", result="hit")
+        else:
+            metrics.inc("table_cache_total", result="miss")
+            task = self._inflight.get(key)
+            if task is None:
+                task = asyncio.create_task(self._render(rows))
+                self._inflight[key] = task
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            pages = await asyncio.shield(task)
+            self._cache[key] = pages
+            while len(self._cache) > TABLE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return [BytesIO(page) for page in pages]
+
+table_renderer = TableRenderer()
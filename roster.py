@@ -0,0 +1,168 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import nonebot
+from nonebot.adapters import Bot, Event
+from nonebot.plugin import on_notice
+from nonebot_plugin_apscheduler import scheduler
+from nonebot_plugin_uninfo import SceneType
+from apscheduler.triggers.interval import IntervalTrigger
+
+from zhenxun.services.log import logger
+
+# 后台刷新群列表和好友列表的间隔，单位分钟
+ROSTER_REFRESH_INTERVAL = 30
+
+class BotRoster:
+    """
+    所有已连接机器人的群列表和好友列表缓存
+
+    机器人连接时和后台定时刷新，进群、退群、加好友时增量更新，
+    按 (ID, 类型) -> 能送达的机器人 建立索引，推送时不再调用获取列表的接口。
+    """
+
+    def __init__(self):
+        # 机器人 -> 群/好友集合
+        self._groups: Dict[str, Set[str]] = {}
+        self._friends: Dict[str, Set[str]] = {}
+        # (ID, 类型) -> 能送达的机器人
+        self._reachable: Dict[Tuple[str, int], Set[str]] = {}
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _key(id: str, type: int) -> Tuple[str, int]:
+        return (str(id), int(type))
+
+    def _add(self, self_id: str, id: str, type: int):
+        self._reachable.setdefault(self._key(id, type), set()).add(self_id)
+
+    def _discard(self, self_id: str, id: str, type: int):
+        key = self._key(id, type)
+        bots = self._reachable.get(key)
+        if bots is not None:
+            bots.discard(self_id)
+            if not bots:
+                del self._reachable[key]
+
+    def _replace(self, self_id: str, groups: Set[str], friends: Set[str]):
+        for group_id in self._groups.get(self_id, set()) - groups:
+            self._discard(self_id, group_id, SceneType.GROUP)
+        for user_id in self._friends.get(self_id, set()) - friends:
+            self._discard(self_id, user_id, SceneType.PRIVATE)
+        for group_id in groups:
+            self._add(self_id, group_id, SceneType.GROUP)
+        for user_id in friends:
+            self._add(self_id, user_id, SceneType.PRIVATE)
+        self._groups[self_id] = groups
+        self._friends[self_id] = friends
+
+    async def refresh_bot(self, bot: Bot):
+        """重新获取一个机器人的群列表和好友列表，失败时保留旧数据"""
+        try:
+            groups = {str(group["group_id"]) for group in await bot.get_group_list()}
+            friends = {str(friend["user_id"]) for friend in await bot.get_friend_list()}
+        except Exception as e:
+            logger.warning(f"获取机器人 {bot.self_id} 的群列表和好友列表失败: {e}")
+            return
+        self._replace(bot.self_id, groups, friends)
+
+    async def refresh(self, only_missing: bool = False):
+        """
+        刷新所有已连接机器人的列表，并清理已断开的机器人
+
+        :param only_missing: 只刷新还没有获取过列表的机器人
+        """
+        async with self._lock:
+            bots = nonebot.get_bots()
+            for self_id in list(self._groups):
+                if self_id not in bots:
+                    self.remove_bot(self_id)
+            await asyncio.gather(*[
+                self.refresh_bot(bot) for self_id, bot in bots.items()
+                if not only_missing or self_id not in self._groups
+            ])
+
+    def remove_bot(self, self_id: str):
+        """机器人断开时移除它的列表"""
+        self._replace(self_id, set(), set())
+        self._groups.pop(self_id, None)
+        self._friends.pop(self_id, None)
+
+    def join(self, self_id: str, id: str, type: int):
+        """机器人进群或加好友"""
+        (self._groups if type == SceneType.GROUP else self._friends).setdefault(self_id, set()).add(str(id))
+        self._add(self_id, id, type)
+
+    def leave(self, self_id: str, id: str, type: int):
+        """机器人退群或删除好友"""
+        (self._groups if type == SceneType.GROUP else self._friends).get(self_id, set()).discard(str(id))
+        self._discard(self_id, id, type)
+
+    def resolve(self, id: str, type: int, prefer: Optional[str] = None) -> Optional[Bot]:
+        """
+        获取能送达指定目标的已连接机器人
+
+        :param id: 用户/群组ID
+        :param type: 场景类型
+        :param prefer: 优先使用的机器人
+        :return: 没有机器人能送达时返回 None
+        """
+        bots = nonebot.get_bots()
+        candidates = [self_id for self_id in self._reachable.get(self._key(id, type), ()) if self_id in bots]
+        if not candidates:
+            return None
+        return bots[prefer] if prefer in candidates else bots[min(candidates)]
+
+    def assign(self, scenes: Iterable[Tuple[str, int]]) -> List[Tuple[Bot, str, int]]:
+        """
+        为每个目标选择一个能送达的机器人，多个机器人都能送达时分给目前分到最少的机器人
+
+        :param scenes: (用户/群组ID, 类型) 列表
+        :return: (机器人, 用户/群组ID, 类型) 列表，没有机器人能送达的目标会被跳过
+        """
+        bots = nonebot.get_bots()
+        load: Dict[str, int] = {}
+        assigned = []
+        for id, type in scenes:
+            candidates = [self_id for self_id in self._reachable.get(self._key(id, type), ()) if self_id in bots]
+            if not candidates:
+                continue
+            self_id = min(candidates, key=lambda self_id: (load.get(self_id, 0), self_id))
+            load[self_id] = load.get(self_id, 0) + 1
+            assigned.append((bots[self_id], id, type))
+        return assigned
+
+bot_roster = BotRoster()
+
+driver = nonebot.get_driver()
+
+@driver.on_bot_connect
+async def _(bot: Bot):
+    await bot_roster.refresh_bot(bot)
+
+@driver.on_bot_disconnect
+async def _(bot: Bot):
+    bot_roster.remove_bot(bot.self_id)
+
+# 机器人进群、退群、加好友时更新列表
+_roster_notice = on_notice(priority=1, block=False)
+
+@_roster_notice.handle()
+async def _(bot: Bot, event: Event):
+    notice_type = getattr(event, "notice_type", None)
+    if notice_type in ("group_increase", "group_decrease"):
+        if str(getattr(event, "user_id", "")) != bot.self_id:
+            return
+        group_id = str(getattr(event, "group_id", ""))
+        if notice_type == "group_increase":
+            bot_roster.join(bot.self_id, group_id, SceneType.GROUP)
+        else:
+            bot_roster.leave(bot.self_id, group_id, SceneType.GROUP)
+    elif notice_type == "friend_add":
+        bot_roster.join(bot.self_id, str(getattr(event, "user_id", "")), SceneType.PRIVATE)
+
+scheduler.add_job(
+    bot_roster.refresh,
+    IntervalTrigger(minutes=ROSTER_REFRESH_INTERVAL),
+    id="refresh_mora_bot_roster"
+)
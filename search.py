@@ -0,0 +1,36 @@
+from nonebot.rule import to_me
+from nonebot_plugin_alconna import Alconna, Args, Arparma, on_alconna
+from nonebot_plugin_uninfo import Uninfo
+from zhenxun.services.log import logger
+from zhenxun.utils.message import MessageUtils
+
+from .archive import release_archive
+
+# 搜索历史新曲命令
+_search_matcher = on_alconna(
+    Alconna("mora搜索", Args["keyword", str]),
+    priority=5,
+    block=True,
+    rule=to_me()
+)
+
+@_search_matcher.handle()
+async def search_albums(session: Uninfo, arparma: Arparma):
+    keyword = arparma.query[str]("keyword")
+    if not keyword or keyword.strip() == '':
+        await MessageUtils.build_message("请输入有效指令，如：mora搜索 YOASOBI").finish()
+
+    try:
+        albums = release_archive.search(keyword)
+    except Exception as e:
+        logger.error(f"搜索 mora 历史新曲失败: {e}")
+        await MessageUtils.build_message(f"搜索mora新曲失败: {e}").finish()
+    if not albums:
+        await MessageUtils.build_message(f"没有找到与 {keyword} 相关的专辑").send()
+        return
+
+    msg = [f"与 {keyword} 相关的专辑：\n"]
+    for idx, album in enumerate(albums, 1):
+        msg.append(f"{idx}. {album['dispStartDate'][:10]} 《{album['title']}》- {album['artistName']}，共{album['trackCount']}首曲子\n")
+
+    await MessageUtils.build_message(msg).send()
@@ -0,0 +1,26 @@
+from nonebot.permission import SUPERUSER
+from nonebot.rule import to_me
+from nonebot_plugin_alconna import Alconna, on_alconna
+from zhenxun.utils.message import MessageUtils
+
+from .cache import cover_cache
+from .dispatcher import push_dispatcher
+from .metrics import metrics
+
+# 查看推送统计命令，仅超级用户可用
+_status_matcher = on_alconna(
+    Alconna("mora状态"),
+    priority=5,
+    block=True,
+    permission=SUPERUSER,
+    rule=to_me()
+)
+
+@_status_matcher.handle()
+async def show_status():
+    msg = [
+        metrics.format_last_push(),
+        f"\n发送器：{push_dispatcher.stats}",
+        f"\n封面缓存：{cover_cache.stats}",
+    ]
+    await MessageUtils.build_message(msg).send()
@@ -0,0 +1,343 @@
+import asyncio
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import nonebot
+
+from zhenxun.configs.path_config import DATA_PATH
+from zhenxun.services.log import logger
+
+config_path: Path = DATA_PATH / "mora/config.json"
+database_path: Path = DATA_PATH / "mora/mora.db"
+
+# 配置存储方式：json 为 config.json 文件，sqlite 为 mora.db 数据库
+STORAGE_BACKEND = "json"
+
+# 修改配置后延迟写入的时间，单位秒，期间的多次修改只写一次文件
+SAVE_DELAY = 1
+
+class SceneStore:
+    """
+    群组/用户配置的内存存储
+
+    启动时读取一次 config.json，按 (id, type) 建立索引，
+    修改后延迟合并写入，写入时先写临时文件再替换。
+    """
+
+    def __init__(self, path: Path = config_path):
+        self.path = path
+        self._scenes: List[Dict[str, Any]] = []
+        self._index: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self._save_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(id: str, type: int) -> Tuple[str, int]:
+        return (str(id), int(type))
+
+    def load(self):
+        """从文件读取全部配置并重建索引"""
+        if self.path.exists() and self.path.stat().st_size > 0:
+            with open(self.path, "r", encoding="utf8") as f:
+                scenes = json.load(f)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            scenes = []
+            self._write(scenes)
+        self._set_scenes(scenes)
+        self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _set_scenes(self, scenes: List[Dict[str, Any]]):
+        self._scenes = scenes
+        self._index = {self._key(item["id"], item["type"]): item for item in scenes}
+
+    def scenes(self) -> List[Dict[str, Any]]:
+        """获取全部场景配置"""
+        self._ensure_loaded()
+        return self._scenes
+
+    def get(self, id: str, type: int) -> Dict[str, Any]:
+        """获取指定ID和类型的场景配置，找不到时返回空字典"""
+        self._ensure_loaded()
+        return self._index.get(self._key(id, type), {})
+
+    def update(self, id: str, type: int, update_data: Dict[str, Any]):
+        """
+        更新或创建指定ID和类型的场景配置
+
+        :param id: 用户/群组ID
+        :param type: 场景类型
+        :param update_data: 要更新的数据字段
+        """
+        self._ensure_loaded()
+        key = self._key(id, type)
+        item = self._index.get(key)
+        if item is None:
+            item = {
+                "id": id,
+                "type": type,
+                "watch_artists": [],
+                "auto_push": False
+            }
+            self._scenes.append(item)
+            self._index[key] = item
+        item.update(update_data)
+        self._schedule_save()
+
+    def replace_all(self, scenes: List[Dict[str, Any]]):
+        """用新的配置列表替换全部配置"""
+        self._set_scenes(scenes)
+        self._loaded = True
+        self._schedule_save()
+
+    def auto_push_scenes(self) -> List[Tuple[str, int]]:
+        """获取所有开启推送的场景"""
+        return [
+            self._key(item["id"], item["type"]) for item in self.scenes()
+            if item.get("auto_push", False)
+        ]
+
+    def follows(self) -> List[Tuple[str, str, int]]:
+        """获取所有场景的关注关系，用于建立关注艺人的反向索引"""
+        return [
+            (artist["name"], str(item["id"]), int(item["type"]))
+            for item in self.scenes()
+            for artist in item.get("watch_artists", [])
+        ]
+
+    async def close(self):
+        """还有未写入的修改时立即写入"""
+        if self._save_task is not None and not self._save_task.done():
+            self._save_task.cancel()
+            await self.flush()
+
+    def _schedule_save(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 不在事件循环中时直接写入
+            self._write(self._scenes)
+            return
+        if self._save_task is None or self._save_task.done():
+            self._save_task = loop.create_task(self._delayed_save())
+
+    async def _delayed_save(self):
+        await asyncio.sleep(SAVE_DELAY)
+        # 写入期间的新修改会重新安排一次写入
+        self._save_task = None
+        await self.flush()
+
+    async def flush(self):
+        """立即写入当前配置"""
+        async with self._lock:
+            data = json.dumps(self._scenes, ensure_ascii=False, indent=2)
+            try:
+                await asyncio.to_thread(self._write_text, data)
+            except Exception as e:
+                logger.error(f"写入 mora 配置失败: {e}")
+
+    def _write(self, scenes: List[Dict[str, Any]]):
+        self._write_text(json.dumps(scenes, ensure_ascii=False, indent=2))
+
+    def _write_text(self, data: str):
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf8") as f:
+            f.write(data)
+        tmp_path.replace(self.path)
+
+class SqliteSceneStore:
+    """
+    群组/用户配置的 SQLite 存储，接口与 SceneStore 相同
+
+    场景、关注艺人、黑名单分表保存，并按场景和艺人名建立索引。
+    首次启动时会从 config.json 导入已有配置，原文件保留不动。
+    """
+
+    ARTIST_TABLES = {
+        "watch_artists": "follows",
+        "blacklist_artists": "blacklists",
+    }
+
+    def __init__(self, path: Path = database_path, json_path: Path = config_path):
+        self.path = path
+        self.json_path = json_path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def _key(id: str, type: int) -> Tuple[str, int]:
+        return (str(id), int(type))
+
+    def load(self):
+        """打开数据库，建表并在需要时从 config.json 迁移"""
+        if self._conn is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS scenes (
+                id TEXT NOT NULL,
+                type INTEGER NOT NULL,
+                auto_push INTEGER NOT NULL DEFAULT 0,
+                extra TEXT NOT NULL DEFAULT '{}',
+                position INTEGER NOT NULL,
+                PRIMARY KEY (id, type)
+            );
+            CREATE INDEX IF NOT EXISTS idx_scenes_auto_push ON scenes (auto_push);
+        """)
+        for table in self.ARTIST_TABLES.values():
+            self._conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    scene_id TEXT NOT NULL,
+                    scene_type INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    alias TEXT NOT NULL DEFAULT '',
+                    type INTEGER,
+                    position INTEGER NOT NULL,
+                    PRIMARY KEY (scene_id, scene_type, name)
+                );
+                CREATE INDEX IF NOT EXISTS idx_{table}_name ON {table} (name);
+            """)
+        self._migrate()
+
+    def _migrate(self):
+        migrated = self._conn.execute("SELECT value FROM meta WHERE key = 'migrated_from_json'").fetchone()
+        if migrated:
+            return
+        if self.json_path.exists() and self.json_path.stat().st_size > 0:
+            with open(self.json_path, "r", encoding="utf8") as f:
+                scenes = json.load(f)
+            self.replace_all(scenes)
+            logger.info(f"已从 {self.json_path.name} 迁移 {len(scenes)} 条 mora 配置")
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from_json', '1')")
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.load()
+        return self._conn
+
+    def _artists(self, table: str, id: str, type: int) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            f"SELECT name, alias, type FROM {table} WHERE scene_id = ? AND scene_type = ? ORDER BY position",
+            (id, type)
+        ).fetchall()
+        return [{"name": row["name"], "alias": row["alias"], "type": row["type"]} for row in rows]
+
+    def _scene_from_row(self, row: sqlite3.Row) -> Dict[str, Any]:
+        item = {"id": row["id"], "type": row["type"]}
+        item.update(json.loads(row["extra"]))
+        item["auto_push"] = bool(row["auto_push"])
+        for field, table in self.ARTIST_TABLES.items():
+            item[field] = self._artists(table, row["id"], row["type"])
+        return item
+
+    def scenes(self) -> List[Dict[str, Any]]:
+        """获取全部场景配置"""
+        rows = self.conn.execute("SELECT * FROM scenes ORDER BY position").fetchall()
+        return [self._scene_from_row(row) for row in rows]
+
+    def get(self, id: str, type: int) -> Dict[str, Any]:
+        """获取指定ID和类型的场景配置，找不到时返回空字典"""
+        row = self.conn.execute(
+            "SELECT * FROM scenes WHERE id = ? AND type = ?", self._key(id, type)
+        ).fetchone()
+        return self._scene_from_row(row) if row else {}
+
+    def update(self, id: str, type: int, update_data: Dict[str, Any]):
+        """
+        更新或创建指定ID和类型的场景配置
+
+        :param id: 用户/群组ID
+        :param type: 场景类型
+        :param update_data: 要更新的数据字段
+        """
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self._update(self._key(id, type), update_data)
+
+    def _update(self, key: Tuple[str, int], update_data: Dict[str, Any]):
+        conn = self._conn
+        row = conn.execute("SELECT extra FROM scenes WHERE id = ? AND type = ?", key).fetchone()
+        if row is None:
+            conn.execute(
+                "INSERT INTO scenes (id, type, auto_push, extra, position) "
+                "VALUES (?, ?, 0, '{}', (SELECT COALESCE(MAX(position), 0) + 1 FROM scenes))",
+                key
+            )
+            extra = {}
+        else:
+            extra = json.loads(row["extra"])
+
+        for field, value in update_data.items():
+            if field in ("id", "type"):
+                continue
+            if field == "auto_push":
+                conn.execute("UPDATE scenes SET auto_push = ? WHERE id = ? AND type = ?", (int(bool(value)), *key))
+            elif field in self.ARTIST_TABLES:
+                table = self.ARTIST_TABLES[field]
+                conn.execute(f"DELETE FROM {table} WHERE scene_id = ? AND scene_type = ?", key)
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO {table} (scene_id, scene_type, name, alias, type, position) VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (*key, artist["name"], artist.get("alias", ""), artist.get("type"), position)
+                        for position, artist in enumerate(value)
+                    ]
+                )
+            else:
+                extra[field] = value
+        conn.execute("UPDATE scenes SET extra = ? WHERE id = ? AND type = ?", (json.dumps(extra, ensure_ascii=False), *key))
+
+    def replace_all(self, scenes: List[Dict[str, Any]]):
+        """用新的配置列表替换全部配置"""
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM scenes")
+            for table in self.ARTIST_TABLES.values():
+                self._conn.execute(f"DELETE FROM {table}")
+            for item in scenes:
+                self._update(self._key(item["id"], item["type"]), item)
+
+    def auto_push_scenes(self) -> List[Tuple[str, int]]:
+        """获取所有开启推送的场景"""
+        rows = self.conn.execute("SELECT id, type FROM scenes WHERE auto_push = 1 ORDER BY position").fetchall()
+        return [(row["id"], row["type"]) for row in rows]
+
+    def follows(self) -> List[Tuple[str, str, int]]:
+        """获取所有场景的关注关系，一次查询 follows 表，不逐个读取场景"""
+        rows = self.conn.execute("SELECT name, scene_id, scene_type FROM follows").fetchall()
+        return [(row["name"], row["scene_id"], row["scene_type"]) for row in rows]
+
+    async def flush(self):
+        """SQLite 每次修改都已提交，无需额外写入"""
+
+    async def close(self):
+        """关闭数据库连接"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+scene_store = SqliteSceneStore() if STORAGE_BACKEND == "sqlite" else SceneStore()
+
+driver = nonebot.get_driver()
+
+@driver.on_startup
+async def _():
+    scene_store.load()
+
+@driver.on_shutdown
+async def _():
+    await scene_store.close()
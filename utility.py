@@ -1,23 +1,27 @@
 import asyncio
 from datetime import datetime
 from io import BytesIO
-import json
-from pathlib import Path
 import re
-from typing import Any, Dict, List
-
-import aiohttp
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
 from nonebot_plugin_uninfo import SceneType
 
 from zhenxun.configs.config import BotConfig
-from zhenxun.utils._image_template import ImageTemplate
+from zhenxun.services.log import logger
+from .cache import cover_cache
 from .checker import MoraReleaseChecker
-from zhenxun.configs.path_config import DATA_PATH
-
-config_path: Path = DATA_PATH / "mora/config.json"
+from .client import get_session
+from .imaging import COVER_GRID, COVER_GRID_MIN_ALBUMS, cover_processor
+from .matching import ArtistMatcher, BlacklistFilter, contain_threshold, split_artist_name
+from .metrics import metrics
+from .render import table_renderer
+from .store import scene_store
 
 DATE_REGEX = re.compile(r'^\d{4}(/\d{1,2}){1,2}$')  # 匹配类似 2025/5/3 的格式
+DATE_RANGE_REGEX = re.compile(r'^(\d{4}/\d{1,2}/\d{1,2})-(\d{4}/\d{1,2}/\d{1,2})$')  # 匹配类似 2025/5/1-2025/5/7 的格式
+
+# 单次查询最多的天数
+MAX_QUERY_DAYS = 31
 
 def parse_date_str(date_str: str) -> datetime.date:
     return datetime.strptime(date_str, "%Y/%m/%d").date()
@@ -25,28 +29,25 @@ def parse_date_str(date_str: str) -> datetime.date:
 def get_date_str(date: datetime.date) -> str:
     return date.strftime('%Y/%m/%d')
 
+# 每个场景编译后的黑名单过滤器，黑名单修改时失效
+_blacklist_filters: Dict[Tuple[str, int], BlacklistFilter] = {}
+# 关注艺人名 -> 关注了该艺人的场景，首次使用时从配置建立，关注列表修改时增量更新
+_artist_followers: Optional[Dict[str, Set[Tuple[str, int]]]] = None
+
 # 读取配置文件
 def load_config() -> List[Dict[str, Any]]:
-    if not config_path.exists():
-        config_path.parent.mkdir(parents=True, exist_ok=True)
-        config_path.touch()
-        save_config([])
-        return []
-    with open(config_path, "r", encoding="utf8") as f:
-        return json.load(f)
+    return scene_store.scenes()
 
 # 写入配置文件
 def save_config(data):
-    with open(config_path, "w", encoding="utf8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    global _artist_followers
+    scene_store.replace_all(data)
+    _blacklist_filters.clear()
+    _artist_followers = None
 
 def get_scene(id: str, type: SceneType) -> Dict[str, Any]:
     """获取指定ID和类型的场景配置"""
-    data = load_config()
-    for item in data:
-        if item["id"] == id and item["type"] == type:
-            return item
-    return {}
+    return scene_store.get(id, type)
 
 def set_scene(id: str, type: SceneType, update_data: Dict[str, Any]):
     """
@@ -56,28 +57,29 @@ def set_scene(id: str, type: SceneType, update_data: Dict[str, Any]):
     :param type: 类型标识 (0=群组, 1=用户等)
     :param update_data: 要更新的数据字段
     """
-    data = load_config()
-    found = False
-    
-    # 更新现有配置项
-    for item in data:
-        if item["id"] == id and item["type"] == type:
-            item.update(update_data)  # 更新所有提供的字段
-            found = True
-            break
-    
-    # 如果找不到，创建新配置项
-    if not found:
-        default_item = {
-            "id": id,
-            "type": type,
-            "watch_artists": [],
-            "auto_push": False
-        }
-        default_item.update(update_data)  # 应用更新数据
-        data.append(default_item)
-    
-    save_config(data)
+    old_names = _watch_names(id, type) if "watch_artists" in update_data else None
+    scene_store.update(id, type, update_data)
+    if "blacklist_artists" in update_data:
+        _blacklist_filters.pop((str(id), int(type)), None)
+    if old_names is not None:
+        _update_followers(id, type, old_names, _watch_names(id, type))
+
+def _watch_names(id: str, type: SceneType) -> Set[str]:
+    return {artist["name"].strip() for artist in get_scene(id, type).get("watch_artists", [])}
+
+def _update_followers(id: str, type: SceneType, old_names: Set[str], new_names: Set[str]):
+    """按关注列表的变化增量更新反向索引"""
+    if _artist_followers is None:
+        return
+    key = (str(id), int(type))
+    for name in old_names - new_names:
+        followers = _artist_followers.get(name)
+        if followers is not None:
+            followers.discard(key)
+            if not followers:
+                del _artist_followers[name]
+    for name in new_names - old_names:
+        _artist_followers.setdefault(name, set()).add(key)
 
 def get_watch_artists(id: str, type: SceneType) -> List[Dict[str, Any]]:
     """
@@ -119,6 +121,20 @@ def set_blacklist_artists(id: str, type: SceneType, artists: List[Dict[str, Any]
     """
     set_scene(id, type, {"blacklist_artists": artists})
 
+def get_blacklist_filter(id: str, type: SceneType) -> BlacklistFilter:
+    """
+    获取指定ID和类型的黑名单过滤器，按场景缓存
+    
+    :param id: 用户/群组ID
+    :param type: 类型标识 (0=群组, 1=用户等)
+    :return: 黑名单过滤器
+    """
+    key = (str(id), int(type))
+    blacklist_filter = _blacklist_filters.get(key)
+    if blacklist_filter is None:
+        blacklist_filter = BlacklistFilter(artist["name"] for artist in get_blacklist_artists(id, type))
+        _blacklist_filters[key] = blacklist_filter
+    return blacklist_filter
 
 def set_push_new_albums(id: str, type: SceneType, auto_push: bool = True):
     """
@@ -140,25 +156,52 @@ def get_push_new_albums(id: str, type: SceneType) -> bool:
     """
     return get_scene(id, type).get("auto_push", False)
     
+def get_auto_push_scenes() -> List[Tuple[str, SceneType]]:
+    """
+    获取所有开启推送的场景
+
+    :return: (用户/群组ID, 类型) 列表
+    """
+    return [(id, SceneType(type)) for id, type in scene_store.auto_push_scenes()]
+
+def get_followed_artists() -> Dict[str, Set[Tuple[str, int]]]:
+    """
+    获取所有场景关注的艺人名及其关注者，返回的索引不应修改
+
+    :return: 去除首尾空白的艺人名 -> (用户/群组ID, 类型) 集合
+    """
+    global _artist_followers
+    if _artist_followers is None:
+        index: Dict[str, Set[Tuple[str, int]]] = {}
+        for name, id, type in scene_store.follows():
+            index.setdefault(name.strip(), set()).add((str(id), int(type)))
+        _artist_followers = index
+    return _artist_followers
+
 def filter_albums(albums: List[Dict[str, Any]], blacklist_artists: List[Dict[str, Any]]):
-    blacklist_names: list[str] = [artist["name"] for artist in blacklist_artists]
-    
-    result = []
-    for album in albums:
-        artistName = album["artistName"]
-        # 检查是否包含任意黑名单名称
-        if not any(black_name in artistName for black_name in blacklist_names):
-            result.append(album)
-    
-    return result
+    # 过滤掉包含任意黑名单名称的艺人的专辑
+    return BlacklistFilter(artist["name"] for artist in blacklist_artists).filter(albums)
 
 async def download_image(url: str) -> BytesIO:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, proxy = BotConfig.system_proxy) as resp:
+    image_data = await cover_cache.get(url)
+    if image_data is not None:
+        return BytesIO(image_data)
+    with metrics.timer("download_image"):
+        async with get_session().get(url, proxy = BotConfig.system_proxy) as resp:
             if resp.status == 200:
                 image_data = await resp.read()
-                return BytesIO(image_data)
-            raise Exception(f"图片下载失败，状态码: {resp.status}")
+            else:
+                metrics.inc("cover_download_failures_total", reason=f"http_{resp.status}")
+                raise Exception(f"图片下载失败，状态码: {resp.status}")
+    metrics.inc("cover_downloads_total")
+    metrics.inc("cover_bytes_total", len(image_data))
+    await cover_cache.put(url, image_data)
+    return BytesIO(image_data)
+
+async def download_cover(url: str) -> BytesIO:
+    """下载封面并缩小、重新压缩，用于关注艺人消息"""
+    image = await download_image(url)
+    return BytesIO(await cover_processor.process(image.getvalue()))
 
 def split_array(arr, chunk_size=500):
     """将数组按指定大小切割"""
@@ -190,30 +233,41 @@ class MoraHelper(MoraReleaseChecker):
         if name == artistName:
             return True
 
-        # 判断是否为纯字母
-        is_pure_alpha = all(c.isalpha() and c.isascii() for c in name)
-
-        # 根据类型设定包含判断的阈值
-        threshold = 6 if is_pure_alpha else 4
+        # 根据是否为纯字母设定包含判断的阈值
+        threshold = contain_threshold(name)
 
         # 情况2：名字长度达到阈值，允许子串包含
         if len(name) >= threshold:
             return name in artistName
 
         # 情况3：名字长度小于阈值，按分隔符分割后精确匹配
-        # 分隔符：& , 、 /
-        parts = re.split(r'[&,、/]', artistName)
-        cleaned_parts = [part.strip() for part in parts if part.strip()]
-        return name in cleaned_parts
+        return name in split_artist_name(artistName)
     
     @staticmethod
-    async def get_watch_artists_albums(albums: List[Dict[str, Any]], watch_artists: List[Dict[str, Any]]):
+    async def get_watch_artists_albums(
+        albums: List[Dict[str, Any]],
+        watch_artists: List[Dict[str, Any]],
+        download: Optional[Callable[[str], Awaitable[BytesIO]]] = None,
+        matcher: Optional[ArtistMatcher] = None,
+        matched: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    ):
+        """
+        获取关注艺人的新专辑消息
+
+        :param albums: 专辑列表
+        :param watch_artists: 关注艺人列表
+        :param download: 下载封面的函数，默认为 download_cover
+        :param matcher: 针对 albums 建立的匹配索引，多次调用时可复用
+        :param matched: 已经匹配好的 关注艺人名 -> 专辑列表，传入时不再匹配
+        """
+        if matched is None:
+            if matcher is None:
+                matcher = ArtistMatcher(albums)
+            matched = matcher.match_many(artist_info["name"] for artist_info in watch_artists)
+
         artist_results = []
         for artist_info in watch_artists:
-            matched_albums = [
-                album for album in albums
-                if MoraHelper.is_same_artist(artist_info["name"], album["artistName"])# or (artist_info["alias"] and artist_info["alias"] in album["artistName"])
-            ]
+            matched_albums = matched[artist_info["name"]]
             if matched_albums:
                 artist_result = {**artist_info, 'albums': matched_albums}
                 artist_results.append(artist_result)
@@ -223,7 +277,7 @@ class MoraHelper(MoraReleaseChecker):
         async def process_album(artist_name: str, idx: int, album: dict):
             album_info = ALBUM_INFO.format(idx=idx, title=album['title'], artistName=album['artistName'], trackCount=album['trackCount'])
             image_url = f"{album['packageUrl']}{album['packageimage']}"
-            image_data = await download_image(image_url)
+            image_data = await (download or download_cover)(image_url)
             return (album_info, image_data)
 
         result_info_list = []
@@ -237,6 +291,19 @@ class MoraHelper(MoraReleaseChecker):
             results = await asyncio.gather(*tasks)
 
             result = [f"{artist_name} 发布了 {len(albums_list)} 张专辑:\n"]
+            if COVER_GRID and len(albums_list) >= COVER_GRID_MIN_ALBUMS:
+                # 所有封面拼成一张图片，每个艺人只上传一张
+                try:
+                    grid = await cover_processor.grid(
+                        [image_data.getvalue() for _, image_data in results],
+                        [f"{idx}. {album['title']}" for idx, album in enumerate(albums_list, 1)]
+                    )
+                except Exception as e:
+                    logger.warning(f"拼接 {artist_name} 的封面失败，逐张发送: {e}")
+                else:
+                    result.append("\n".join(album_info for album_info, _ in results) + "\n")
+                    result.append(BytesIO(grid))
+                    return result
             for album_info, image_data in results:
                 result.append(album_info)
                 result.append(image_data)
@@ -247,21 +314,12 @@ class MoraHelper(MoraReleaseChecker):
         return result_info_list
 
     @staticmethod 
-    async def get_all_albums_image(albums: List[Dict[str, Any]], target_date: datetime.date):
+    async def get_all_albums_image(albums: List[Dict[str, Any]], target_date: datetime.date, region: str = "jpn"):
         process_string = lambda text: ((text or "").replace('\n', '').replace('\r', ''))[:20]
         pic_source = [[process_string(album['title']),
                         process_string(album['artistName']),
                         process_string(album['packageComment'])] for album in albums]
         result = [TOTAL_INFO.format(date=get_date_str(target_date))]
-        # 一页500张专辑，避免图片过大上传失败
-        for idx, sourceItem in enumerate(split_array(pic_source, 500), 1):
-            img = await ImageTemplate.table_page(
-                f"所有新曲 第 {idx} 页 共 {len(sourceItem)} 首",
-                None,
-                ['专辑名', '艺人', '简介'],
-                sourceItem,
-                10,
-                10
-            )
-            result.append(img)
+        # 按目标图片大小分页渲染，避免图片过大上传失败
+        result.extend(await table_renderer.render(pic_source, get_date_str(target_date), region))
         return result
\ No newline at end of file
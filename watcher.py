@@ -0,0 +1,117 @@
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from zhenxun.services.log import logger
+
+from .checker import MoraReleaseChecker
+from .client import get_session
+
+# 第一次重试前的等待时间，单位秒，之后每次翻倍
+WATCH_INITIAL_DELAY = 5
+# 两次轮询之间的最长等待时间，单位秒
+WATCH_MAX_DELAY = 60
+# 等待新曲发布的总时长，单位秒
+WATCH_TIMEOUT = 600
+
+class ReleaseWatcher:
+    """
+    轮询新曲列表第一页，等待目标日期的专辑发布
+
+    只请求第一页，并通过 ETag/If-Modified-Since 或内容哈希跳过未变化的响应，
+    轮询间隔按指数退避并加入随机抖动。
+    """
+
+    def __init__(
+        self,
+        initial_delay: float = WATCH_INITIAL_DELAY,
+        max_delay: float = WATCH_MAX_DELAY,
+        timeout: float = WATCH_TIMEOUT
+    ):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+
+    @staticmethod
+    def is_published(first_page: dict, target_date: datetime.date) -> bool:
+        """
+        根据第一页判断目标日期的专辑是否已经发布
+
+        第一页全部晚于目标日期时无法从第一页判断，视为已发布交给完整拉取处理。
+        """
+        target_date_str = target_date.strftime("%Y/%m/%d") + " 00:00:00"
+        dates = [album["dispStartDate"] for album in first_page.get("newReleaseList", [])]
+        if not dates:
+            return False
+        return target_date_str in dates or min(dates) > target_date_str
+
+    async def wait_for(self, target_date: datetime.date, region: str = "jpn", deadline: Optional[float] = None) -> bool:
+        """
+        等待目标日期的专辑出现在新曲列表中
+
+        :param target_date: 要等待的日期
+        :param region: 地区代码
+        :param deadline: 截止时间（time.monotonic），默认为 timeout 秒后
+        :return: 超时前是否已经发布
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.timeout
+        timestamp = int(time.mktime(target_date.timetuple())) * 1000
+        validators: Dict[str, str] = {}
+        delay = self.initial_delay
+        attempt = 0
+        while True:
+            attempt += 1
+            first_page = await MoraReleaseChecker.fetch_page_if_changed(
+                get_session(), region, 1, timestamp, validators
+            )
+            if first_page is not None and self.is_published(first_page, target_date):
+                logger.info(f"{target_date} 的 mora 新曲已发布，轮询 {attempt} 次")
+                return True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.error(f"等待 {target_date} 的 mora 新曲超时，轮询 {attempt} 次")
+                return False
+            sleep_time = min(random.uniform(delay / 2, delay), remaining)
+            logger.info(f"{target_date} 的 mora 新曲尚未发布，{sleep_time:.1f} 秒后重试")
+            await asyncio.sleep(sleep_time)
+            delay = min(delay * 2, self.max_delay)
+
+    async def fetch_released(self, target_date: datetime.date, region: str = "jpn") -> List[Dict[str, Any]]:
+        """
+        等待目标日期的专辑发布后强制完整拉取，拉取为空或有分页失败时按同样的退避重试，直到等待超时
+
+        :param target_date: 要拉取的日期
+        :param region: 地区代码
+        :return: 去重后的专辑列表，超时时为最后一次拉取到的结果，可能为空或不完整
+        """
+        deadline = time.monotonic() + self.timeout
+        if not await self.wait_for(target_date, region, deadline):
+            return []
+        delay = self.initial_delay
+        attempt = 0
+        while True:
+            attempt += 1
+            failed_pages: List[int] = []
+            albums = await MoraReleaseChecker.get_albums(
+                target_date = target_date,
+                region = region,
+                force_refresh = True,
+                failed_pages = failed_pages
+            )
+            if albums and not failed_pages:
+                return albums
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.error(f"拉取 {target_date} 的 mora 新曲超时，共拉取 {attempt} 次，{len(albums)} 张专辑")
+                return albums
+            sleep_time = min(random.uniform(delay / 2, delay), remaining)
+            logger.warning(f"{target_date} 的 mora 新曲拉取不完整，{sleep_time:.1f} 秒后重试")
+            await asyncio.sleep(sleep_time)
+            delay = min(delay * 2, self.max_delay)
+
+release_watcher = ReleaseWatcher()